@@ -1,78 +1,112 @@
 """Security utilities for JWT and password hashing."""
+import hashlib
+import threading
 from datetime import datetime, timedelta, timezone
 from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from uuid import UUID
+import jwt
+from jwt.exceptions import PyJWTError
+from cachetools import TTLCache
+from argon2 import PasswordHasher
+from argon2.exceptions import VerifyMismatchError, InvalidHashError
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select, Row
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.db.sessions import get_db
+from app.db.sessions import get_async_db
 from app.models.user import User
 
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing (Argon2id). Parameters follow the argon2-cffi RFC 9106
+# "low memory" profile; tune via time/memory cost if login latency matters.
+password_hasher = PasswordHasher(time_cost=2, memory_cost=65536, parallelism=4)
 
-# Force-passlib to initialize bcrypt backend using a short password so that
-# later calls with long passwords don't trigger backend detection using the
-# user's long password (which would raise a ValueError when >72 bytes).
-try:
-    pwd_context.hash("__init__")
-except Exception:
-    # If backend isn't available or initialization fails, ignore here; the
-    # actual hash/verify calls will surface meaningful errors later.
-    pass
+# Prefixes of legacy bcrypt hashes created before the Argon2 migration.
+BCRYPT_PREFIXES = ("$2a$", "$2b$", "$2y$")
 
 # JWT bearer token scheme
 security = HTTPBearer()
 
+# JWT settings are fixed for the life of the process
+_JWT_SECRET = settings.SECRET_KEY
+_JWT_ALGORITHM = settings.ALGORITHM
+_JWT_ALGORITHMS = [_JWT_ALGORITHM]
+_JWT_HEADERS = {"alg": _JWT_ALGORITHM, "typ": "JWT"}
+_JWT_DEFAULT_EXPIRY = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+_JWT_DECODE_OPTIONS = {"require": ["exp", "sub"]}
+
+# Short-lived cache of authenticated users keyed by a hash of the bearer
+# token, so warm clients skip the users lookup. The token is still decoded
+# (signature + exp) on every request before the cache is consulted.
+USER_CACHE_TTL_SECONDS = 30
+_user_cache: TTLCache = TTLCache(maxsize=10000, ttl=USER_CACHE_TTL_SECONDS)
+_user_cache_lock = threading.Lock()
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against a hashed password."""
-    return pwd_context.verify(_truncate_for_bcrypt(plain_password), hashed_password)
+    if hashed_password.startswith(BCRYPT_PREFIXES):
+        return _verify_legacy_bcrypt(plain_password, hashed_password)
+    try:
+        return password_hasher.verify(hashed_password, plain_password)
+    except (VerifyMismatchError, InvalidHashError):
+        return False
 
 
 def get_password_hash(password: str) -> str:
     """Hash a password."""
-    return pwd_context.hash(_truncate_for_bcrypt(password))
+    return password_hasher.hash(password)
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Return True if the stored hash is bcrypt or uses outdated Argon2 parameters."""
+    if hashed_password.startswith(BCRYPT_PREFIXES):
+        return True
+    try:
+        return password_hasher.check_needs_rehash(hashed_password)
+    except InvalidHashError:
+        return True
 
 
-def _truncate_for_bcrypt(password: str) -> str:
-    """Truncate password to bcrypt's 72-byte limit.
+def _verify_legacy_bcrypt(plain_password: str, hashed_password: str) -> bool:
+    """Verify a bcrypt hash created before the Argon2 migration.
 
-    Bcrypt rejects inputs longer than 72 bytes. We truncate on the UTF-8
-    encoded bytes and decode with 'ignore' to avoid splitting multi-byte
-    sequences. This matches passlib's recommendation to "truncate manually"
-    while preserving valid UTF-8 characters.
+    passlib is imported lazily so it is only loaded when an old account logs
+    in. Bcrypt rejects inputs longer than 72 bytes, so the password is
+    truncated on its UTF-8 bytes exactly as it was when the hash was created;
+    short ASCII passwords are already within the limit and skip the re-encode.
     """
-    if not isinstance(password, str):
-        return password
-    b = password.encode("utf-8")[:72]
-    return b.decode("utf-8", "ignore")
+    from passlib.hash import bcrypt
+
+    if len(plain_password) <= 72 and plain_password.isascii():
+        truncated = plain_password
+    else:
+        truncated = plain_password.encode("utf-8")[:72].decode("utf-8", "ignore")
+    try:
+        return bcrypt.verify(truncated, hashed_password)
+    except ValueError:
+        return False
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
-    
-    if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
-    else:
-        expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return encoded_jwt
+    to_encode["exp"] = datetime.now(timezone.utc) + (expires_delta or _JWT_DEFAULT_EXPIRY)
+    return jwt.encode(to_encode, _JWT_SECRET, algorithm=_JWT_ALGORITHM, headers=_JWT_HEADERS)
 
 
 def decode_token(token: str) -> dict:
     """Decode and validate a JWT token."""
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
-    except JWTError:
+        return jwt.decode(
+            token,
+            _JWT_SECRET,
+            algorithms=_JWT_ALGORITHMS,
+            options=_JWT_DECODE_OPTIONS
+        )
+    except PyJWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
@@ -80,30 +114,66 @@ def decode_token(token: str) -> dict:
         )
 
 
+def _user_id_from_payload(payload: dict) -> UUID:
+    """Extract the user id from the `sub` claim of a decoded token."""
+    try:
+        return UUID(payload["sub"])
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+async def get_current_user_id(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> UUID:
+    """
+    Dependency returning the authenticated user's id from the JWT alone.
+    
+    The signed token is trusted, so no database lookup is made. Use this for
+    routes that only need the id for ownership checks.
+    
+    Usage:
+        @router.get("/protected")
+        def protected_route(current_user_id: UUID = Depends(get_current_user_id)):
+            return {"user_id": current_user_id}
+    """
+    payload = decode_token(credentials.credentials)
+    return _user_id_from_payload(payload)
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
+    db: AsyncSession = Depends(get_async_db)
+) -> Row:
     """
     Dependency to get the current authenticated user from JWT token.
     
+    Returns a lightweight row with the user's `id`, `name`, `email` and
+    `created_at` (the password hash is never loaded).
+    
     Usage:
         @router.get("/protected")
-        def protected_route(current_user: User = Depends(get_current_user)):
+        def protected_route(current_user = Depends(get_current_user)):
             return {"user_id": current_user.id}
     """
     token = credentials.credentials
     payload = decode_token(token)
     
-    user_id: str = payload.get("sub")
-    if user_id is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    cache_key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    with _user_cache_lock:
+        cached_user = _user_cache.get(cache_key)
+    if cached_user is not None:
+        return cached_user
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user_id = _user_id_from_payload(payload)
+    
+    result = await db.execute(
+        select(User.id, User.name, User.email, User.created_at).where(User.id == user_id)
+    )
+    user = result.first()
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -111,4 +181,7 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    with _user_cache_lock:
+        _user_cache[cache_key] = user
+    
     return user
@@ -1,3 +1,18 @@
+from sqlalchemy import insert
 from sqlalchemy.orm import declarative_base
 
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
+
+
+class BulkCreateMixin:
+    """Adds a multi-row INSERT helper for models created in large batches."""
+
+    @classmethod
+    def bulk_create(cls, session, rows: list[dict]) -> None:
+        """Insert `rows` in one executemany INSERT, skipping the unit of work.
+
+        Python-side column defaults (ids, empty arrays) are still applied; the
+        rows are not added to the session's identity map.
+        """
+        if rows:
+            session.execute(insert(cls), rows)
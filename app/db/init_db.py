@@ -0,0 +1,28 @@
+"""One-shot schema bootstrap.
+
+Creates any missing tables for the registered models. Run it once before
+starting the API (e.g. from a container entrypoint) instead of on every
+worker import:
+
+    python -m app.db.init_db
+
+Changes to existing tables are applied with the SQL scripts in `migrations/`.
+"""
+import logging
+
+from app.db.base import Base
+from app.db.sessions import engine
+
+# Import all models to ensure they're registered with Base
+import app.models  # noqa: F401
+
+logger = logging.getLogger("app.db.init_db")
+
+
+def init_db() -> None:
+    Base.metadata.create_all(bind=engine)
+    logger.info("Database schema is up to date (%d tables)", len(Base.metadata.tables))
+
+
+if __name__ == "__main__":
+    init_db()
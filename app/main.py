@@ -1,28 +1,41 @@
+import logging
+
+# Logging is configured once, by the application entrypoint, before any app
+# module logs at import time
+logging.basicConfig(level=logging.INFO)
+
+import anyio
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import configure_mappers
 from app.routes import auth, kb, quiz
 from app.routes import teach
-from app.db.base import Base
-from app.db.sessions import engine
 from app.core.config import settings
+from app.db.sessions import warm_pool, warm_async_pool
 
-# Import all models to ensure they're registered with Base
-import app.models
+# The routers import every model the relationship graph needs; finalize the
+# mappers once here instead of on the first query a worker serves
+configure_mappers()
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+# Schema is created out-of-band (`python -m app.db.init_db`); opt in for local dev
+if settings.AUTO_CREATE_TABLES:
+    from app.db.init_db import init_db
+    init_db()
 
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
-    description="NotebookLM-inspired document learning and examination platform"
+    description="NotebookLM-inspired document learning and examination platform",
+    default_response_class=ORJSONResponse,
 )
 
-# CORS configuration
+# CORS configuration; credentials are not allowed with a wildcard origin
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS,
-    allow_credentials=True,
+    allow_credentials="*" not in settings.CORS_ORIGINS,
     allow_methods=["*"],
     allow_headers=["*"],
 )
@@ -37,10 +50,21 @@ app.include_router(teach.router)
 @app.on_event("startup")
 async def startup_event():
     print(f"🚀 {settings.APP_NAME} v{settings.APP_VERSION} starting...")
+    # Sync routes run in anyio's threadpool (40 threads by default)
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_SIZE
+    # Open the pools' connections now so the first requests don't pay for
+    # TCP + TLS + auth setup
+    await run_in_threadpool(warm_pool)
+    await warm_async_pool()
     print("📚 Database connected")
     print("🔐 JWT authentication enabled")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    kb.shutdown_parse_pool()
+
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
\ No newline at end of file
@@ -5,6 +5,7 @@ from app.models.document import Document
 from app.models.chunk import Chunk
 from app.models.quiz import Quiz, QuizQuestion, QuizAnswer, QuizSummary
 from app.models.question_bank import QuestionBank
+from app.models.parsed_content import ParsedContent
 from app.models.teaching_module import TeachingModule
 from app.models.teaching_concept import TeachingConcept
 from app.models.teaching_session import TeachingSession
@@ -20,6 +21,7 @@ __all__ = [
     "QuizAnswer",
     "QuizSummary",
     "QuestionBank",
+    "ParsedContent",
     "TeachingModule",
     "TeachingConcept",
     "TeachingSession",
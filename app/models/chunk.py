@@ -1,27 +1,33 @@
 """Chunk model."""
-import uuid
-from datetime import datetime
-from sqlalchemy import Column, String, DateTime, Text, Integer, ForeignKey, ARRAY
+from sqlalchemy import Column, String, DateTime, Text, Integer, ForeignKey, ARRAY, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
-from app.db.base import Base
+from sqlalchemy.sql import func
+from app.utils.ids import uuid7
+from app.db.base import Base, BulkCreateMixin
 
 
-class Chunk(Base):
+class Chunk(Base, BulkCreateMixin):
     """Chunk model matching DDL schema."""
     
     __tablename__ = "chunks"
+    __table_args__ = (
+        Index("ix_chunks_kb_topic", "kb_id", "topic"),
+        Index("ix_chunks_document_page", "document_id", "page_number"),
+        Index("ix_chunks_document_index", "document_id", "chunk_index"),
+    )
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     kb_id = Column(UUID(as_uuid=True), ForeignKey("knowledge_bases.id", ondelete="CASCADE"), nullable=False, index=True)
     document_id = Column(UUID(as_uuid=True), ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
+    chunk_index = Column(Integer, nullable=False)  # position within the document, from 0
     text = Column(Text, nullable=False)
     topic = Column(String(200), index=True)
     section = Column(String(200))
     page_number = Column(Integer)
     keywords = Column(ARRAY(Text))
     source_file = Column(String(255))
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     
     # Relationships
     knowledge_base = relationship("KnowledgeBase", back_populates="chunks")
@@ -1,9 +1,9 @@
 """Knowledge base model."""
 import uuid
-from datetime import datetime
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 from app.db.base import Base
 
 
@@ -17,7 +17,13 @@ class KnowledgeBase(Base):
     title = Column(String(200), nullable=False)
     description = Column(Text)
     status = Column(String(30), default="UPLOADED")
-    created_at = Column(DateTime, default=datetime.utcnow)
+    question_bank_status = Column(String(30))  # PENDING / COMPLETED / FAILED
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    # Matches list_knowledge_bases: filter by owner, newest first
+    __table_args__ = (
+        Index("ix_knowledge_bases_user_created", user_id, created_at.desc()),
+    )
     
     # Relationships
     user = relationship("User", back_populates="knowledge_bases")
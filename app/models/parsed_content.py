@@ -0,0 +1,18 @@
+"""Parsed content cache model."""
+from sqlalchemy import Column, String, DateTime, Text
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class ParsedContent(Base):
+    """Text extracted from an uploaded file, keyed by a hash of its bytes.
+
+    Lets identical files uploaded again (e.g. the same PDF in another KB) skip
+    text extraction.
+    """
+    
+    __tablename__ = "parsed_contents"
+    
+    content_hash = Column(String(32), primary_key=True)  # blake2b-128 hex digest
+    text = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
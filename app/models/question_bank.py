@@ -1,24 +1,29 @@
 """Question bank model."""
 import uuid
-from datetime import datetime
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey, ARRAY
+from sqlalchemy import Column, String, DateTime, Text, Float, ForeignKey, ARRAY, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
-from app.db.base import Base
+from sqlalchemy.sql import func
+from app.db.base import Base, BulkCreateMixin
 
 
-class QuestionBank(Base):
+class QuestionBank(Base, BulkCreateMixin):
     """Question bank model for storing pre-generated questions per KB."""
     
     __tablename__ = "question_bank"
+    # Quiz sampling seeks to a random point in random_key order per difficulty
+    __table_args__ = (
+        Index("ix_question_bank_kb_difficulty_random", "kb_id", "difficulty", "random_key"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    kb_id = Column(UUID(as_uuid=True), ForeignKey("knowledge_bases.id", ondelete="CASCADE"), nullable=False, index=True)
+    kb_id = Column(UUID(as_uuid=True), ForeignKey("knowledge_bases.id", ondelete="CASCADE"), nullable=False)
     question_text = Column(Text, nullable=False)
     correct_answer = Column(Text, nullable=False)
     options = Column(ARRAY(Text))  # For MCQ options [A, B, C, D]
     difficulty = Column(String(20), nullable=False)  # EASY / MEDIUM / HARD
-    created_at = Column(DateTime, default=datetime.utcnow)
+    random_key = Column(Float, nullable=False, server_default=func.random())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     
     # Relationships
     knowledge_base = relationship("KnowledgeBase", back_populates="question_bank")
@@ -1,11 +1,12 @@
 """Quiz models."""
 import uuid
-from datetime import datetime
-from decimal import Decimal
-from sqlalchemy import Column, String, DateTime, Text, Integer, ForeignKey, Numeric, ARRAY
+from sqlalchemy import Column, String, DateTime, Text, Integer, SmallInteger, ForeignKey, ARRAY, Index
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
-from app.db.base import Base
+from sqlalchemy.sql import func
+from app.utils.ids import uuid7
+from app.db.base import Base, BulkCreateMixin
 
 
 class Quiz(Base):
@@ -18,22 +19,25 @@ class Quiz(Base):
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     difficulty = Column(String(20), nullable=False)  # EASY / MEDIUM / HARD / MIXED
     num_questions = Column(Integer, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     
     # Relationships
     knowledge_base = relationship("KnowledgeBase", back_populates="quizzes")
     user = relationship("User", back_populates="quizzes")
-    questions = relationship("QuizQuestion", back_populates="quiz", cascade="all, delete-orphan")
+    questions = relationship("QuizQuestion", back_populates="quiz", cascade="all, delete-orphan", order_by="QuizQuestion.question_order")
     summaries = relationship("QuizSummary", back_populates="quiz", cascade="all, delete-orphan")
 
 
-class QuizQuestion(Base):
+class QuizQuestion(Base, BulkCreateMixin):
     """Quiz question model matching DDL schema."""
     
     __tablename__ = "quiz_questions"
+    __table_args__ = (
+        Index("ix_quiz_questions_quiz_order", "quiz_id", "question_order"),
+    )
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    quiz_id = Column(UUID(as_uuid=True), ForeignKey("quizzes.id", ondelete="CASCADE"), nullable=False, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    quiz_id = Column(UUID(as_uuid=True), ForeignKey("quizzes.id", ondelete="CASCADE"), nullable=False)
     chunk_id = Column(UUID(as_uuid=True), ForeignKey("chunks.id", ondelete="SET NULL"))
     question_text = Column(Text, nullable=False)
     correct_answer = Column(Text)  # For answer key
@@ -47,21 +51,35 @@ class QuizQuestion(Base):
     answers = relationship("QuizAnswer", back_populates="question", cascade="all, delete-orphan")
 
 
-class QuizAnswer(Base):
+class QuizAnswer(Base, BulkCreateMixin):
     """Quiz answer model matching DDL schema."""
     
     __tablename__ = "quiz_answers"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     question_id = Column(UUID(as_uuid=True), ForeignKey("quiz_questions.id", ondelete="CASCADE"), nullable=False)
     user_answer = Column(Text, nullable=False)
-    score = Column(Numeric(4, 2))  # 0.00 → 1.00
+    score_hundredths = Column("score", SmallInteger)  # 0 → 100 (score × 100)
     result = Column(String(20))  # CORRECT / PARTIAL / WRONG
     feedback = Column(Text)
-    answered_at = Column(DateTime, default=datetime.utcnow)
+    answered_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     
     # Relationships
     question = relationship("QuizQuestion", back_populates="answers")
+    
+    @hybrid_property
+    def score(self):
+        """Score as a float in 0.00 → 1.00."""
+        return None if self.score_hundredths is None else self.score_hundredths / 100
+    
+    @score.inplace.setter
+    def _score_setter(self, value):
+        self.score_hundredths = None if value is None else round(value * 100)
+    
+    @score.inplace.expression
+    @classmethod
+    def _score_expression(cls):
+        return cls.score_hundredths / 100.0
 
 
 class QuizSummary(Base):
@@ -73,11 +91,25 @@ class QuizSummary(Base):
     quiz_id = Column(UUID(as_uuid=True), ForeignKey("quizzes.id", ondelete="CASCADE"), nullable=False)
     total_questions = Column(Integer)
     correct_answers = Column(Integer)
-    accuracy = Column(Numeric(5, 2))
+    accuracy_hundredths = Column("accuracy", SmallInteger)  # percent × 100
     strength_topics = Column(ARRAY(Text))
     weak_topics = Column(ARRAY(Text))
     system_verdict = Column(Text)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     
     # Relationships
     quiz = relationship("Quiz", back_populates="summaries")
+    
+    @hybrid_property
+    def accuracy(self):
+        """Accuracy as a percentage in 0.00 → 100.00."""
+        return None if self.accuracy_hundredths is None else self.accuracy_hundredths / 100
+    
+    @accuracy.inplace.setter
+    def _accuracy_setter(self, value):
+        self.accuracy_hundredths = None if value is None else round(value * 100)
+    
+    @accuracy.inplace.expression
+    @classmethod
+    def _accuracy_expression(cls):
+        return cls.accuracy_hundredths / 100.0
@@ -1,27 +1,34 @@
 """TeachingConcept model."""
 import uuid
-from datetime import datetime
-from sqlalchemy import Column, String, DateTime, Text, JSON, ForeignKey, ARRAY
+from sqlalchemy import Column, String, DateTime, Text, Integer, JSON, ForeignKey, ARRAY, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
-from app.db.base import Base
+from sqlalchemy.sql import func
+from app.db.base import Base, BulkCreateMixin
 
 
-class TeachingConcept(Base):
+class TeachingConcept(Base, BulkCreateMixin):
     """TeachingConcept model matching DDL schema."""
 
     __tablename__ = "teaching_concepts"
+    __table_args__ = (
+        Index("ix_concepts_module_sequence", "module_id", "sequence_order"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     module_id = Column(UUID(as_uuid=True), ForeignKey("teaching_modules.id", ondelete="CASCADE"), nullable=False, index=True)
     concept_name = Column(String(300), nullable=False)
+    sequence_order = Column(Integer, nullable=False)  # position within the module, from 1
     explanation = Column(Text, nullable=False)
     chunk_ids = Column(ARRAY(UUID), default=list)
     keywords = Column(ARRAY(Text), default=list)
     related_concept_ids = Column(ARRAY(UUID), default=list)
     checkpoint_question = Column(Text)
     checkpoint_options = Column(JSONB)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # [{chunk_id, page, highlight}] for chunk_ids, filled in at build time so
+    # rendering a concept needs no chunk lookup; NULL for older concepts
+    citations = Column(JSONB)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     # Relationships
     module = relationship("TeachingModule", back_populates="concepts")
@@ -1,9 +1,9 @@
 """TeachingInteraction model."""
-import uuid
-from datetime import datetime
 from sqlalchemy import Column, DateTime, String, Text, Boolean, Integer, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.utils.ids import uuid7
 from app.db.base import Base
 
 
@@ -12,7 +12,7 @@ class TeachingInteraction(Base):
 
     __tablename__ = "teaching_interactions"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     session_id = Column(UUID(as_uuid=True), ForeignKey("teaching_sessions.id", ondelete="CASCADE"), nullable=False, index=True)
     module_id = Column(UUID(as_uuid=True), ForeignKey("teaching_modules.id"))
     concept_id = Column(UUID(as_uuid=True), ForeignKey("teaching_concepts.id"))
@@ -21,7 +21,7 @@ class TeachingInteraction(Base):
     system_response = Column(Text)
     checkpoint_correct = Column(Boolean)
     time_spent_seconds = Column(Integer)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     # Relationships
     session = relationship("TeachingSession", back_populates="interactions")
@@ -1,19 +1,22 @@
 """TeachingModule model."""
 import uuid
-from datetime import datetime
-from sqlalchemy import Column, String, DateTime, Text, Integer, ForeignKey, ARRAY
+from sqlalchemy import Column, String, DateTime, Text, Integer, ForeignKey, ARRAY, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
-from app.db.base import Base
+from sqlalchemy.sql import func
+from app.db.base import Base, BulkCreateMixin
 
 
-class TeachingModule(Base):
+class TeachingModule(Base, BulkCreateMixin):
     """TeachingModule model matching DDL schema."""
 
     __tablename__ = "teaching_modules"
+    __table_args__ = (
+        Index("ix_teaching_modules_kb_sequence", "kb_id", "sequence_order"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    kb_id = Column(UUID(as_uuid=True), ForeignKey("knowledge_bases.id", ondelete="CASCADE"), nullable=False, index=True)
+    kb_id = Column(UUID(as_uuid=True), ForeignKey("knowledge_bases.id", ondelete="CASCADE"), nullable=False)
     parent_module_id = Column(UUID(as_uuid=True), ForeignKey("teaching_modules.id", ondelete="CASCADE"))
     title = Column(String(500), nullable=False)
     description = Column(Text)
@@ -22,7 +25,7 @@ class TeachingModule(Base):
     difficulty_level = Column(String(20))
     prerequisites = Column(ARRAY(UUID), default=list)
     learning_objectives = Column(ARRAY(Text), default=list)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     # Relationships
     knowledge_base = relationship("KnowledgeBase")
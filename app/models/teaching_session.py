@@ -1,9 +1,11 @@
 """TeachingSession model."""
 import uuid
-from datetime import datetime
-from sqlalchemy import Column, DateTime, ForeignKey, Numeric, JSON, ARRAY
+from sqlalchemy import Column, DateTime, ForeignKey, SmallInteger, JSON, ARRAY, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.ext.mutable import MutableDict
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 from app.db.base import Base
 
 
@@ -17,15 +19,40 @@ class TeachingSession(Base):
     kb_id = Column(UUID(as_uuid=True), ForeignKey("knowledge_bases.id", ondelete="CASCADE"), nullable=False, index=True)
     current_module_id = Column(UUID(as_uuid=True), ForeignKey("teaching_modules.id"))
     current_concept_id = Column(UUID(as_uuid=True), ForeignKey("teaching_concepts.id"))
-    progress_percentage = Column(Numeric(5,2), default=0.00)
+    progress_hundredths = Column("progress_percentage", SmallInteger, default=0)  # percent × 100
     completed_modules = Column(ARRAY(UUID), default=list)
     weak_concepts = Column(ARRAY(UUID), default=list)
-    session_state = Column(JSONB, default={})
-    started_at = Column(DateTime, default=datetime.utcnow)
-    last_active_at = Column(DateTime, default=datetime.utcnow)
-    completed_at = Column(DateTime)
+    # MutableDict: in-place changes (state["retry_count"] += 1) mark the row dirty
+    session_state = Column(MutableDict.as_mutable(JSONB), default=dict)
+    started_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_active_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    completed_at = Column(DateTime(timezone=True))
+
+    # Matches start_session's resume lookup: the user's open session for a KB,
+    # most recently active first
+    __table_args__ = (
+        Index(
+            "ix_teaching_sessions_active",
+            user_id, kb_id, last_active_at.desc(),
+            postgresql_where=completed_at.is_(None),
+        ),
+    )
 
     # Relationships
     user = relationship("User")
     knowledge_base = relationship("KnowledgeBase")
     interactions = relationship("TeachingInteraction", back_populates="session", cascade="all, delete-orphan")
+
+    @hybrid_property
+    def progress_percentage(self):
+        """Progress as a percentage in 0.00 → 100.00."""
+        return None if self.progress_hundredths is None else self.progress_hundredths / 100
+
+    @progress_percentage.inplace.setter
+    def _progress_percentage_setter(self, value):
+        self.progress_hundredths = None if value is None else round(value * 100)
+
+    @progress_percentage.inplace.expression
+    @classmethod
+    def _progress_percentage_expression(cls):
+        return cls.progress_hundredths / 100.0
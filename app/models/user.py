@@ -1,9 +1,9 @@
 """User model."""
 import uuid
-from datetime import datetime
-from sqlalchemy import Column, String, DateTime
+from sqlalchemy import Column, String, DateTime, CheckConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 from app.db.base import Base
 
 
@@ -15,8 +15,15 @@ class User(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String(100), nullable=False)
     email = Column(String(150), unique=True, nullable=False, index=True)
-    password_hash = Column(String, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # Argon2id encoded hashes are 97 chars at the current parameters; leave
+    # headroom for tuning the cost parameters
+    password_hash = Column(String(128), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    # Reject empty password hashes
+    __table_args__ = (
+        CheckConstraint("length(password_hash) > 0", name="ck_users_password_hash_not_empty"),
+    )
     
     # Relationships
     knowledge_bases = relationship("KnowledgeBase", back_populates="user", cascade="all, delete-orphan")
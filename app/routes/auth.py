@@ -1,18 +1,21 @@
 """Authentication routes."""
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, EmailStr
-from datetime import timedelta
+from datetime import datetime
+from uuid import UUID
 
-from app.db.sessions import get_db
+from app.db.sessions import get_async_db
 from app.models.user import User
 from app.core.security import (
     get_password_hash,
     verify_password,
+    password_needs_rehash,
     create_access_token,
     get_current_user
 )
-from app.core.config import settings
 
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -33,23 +36,23 @@ class LoginRequest(BaseModel):
 class TokenResponse(BaseModel):
     access_token: str
     token_type: str = "bearer"
-    user_id: str
+    user_id: UUID
     name: str
     email: str
 
 
 class UserResponse(BaseModel):
-    id: str
+    id: UUID
     name: str
     email: str
-    created_at: str
+    created_at: datetime
     
     class Config:
         from_attributes = True
 
 
 @router.post("/register", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
-def register(request: RegisterRequest, db: Session = Depends(get_db)):
+async def register(request: RegisterRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Register a new user.
     
@@ -57,7 +60,8 @@ def register(request: RegisterRequest, db: Session = Depends(get_db)):
     - Returns JWT access token
     """
     # Check if user already exists
-    existing_user = db.query(User).filter(User.email == request.email).first()
+    result = await db.execute(select(User).where(User.email == request.email))
+    existing_user = result.scalar_one_or_none()
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -68,29 +72,26 @@ def register(request: RegisterRequest, db: Session = Depends(get_db)):
     user = User(
         name=request.name,
         email=request.email,
-        password_hash=get_password_hash(request.password)
+        password_hash=await run_in_threadpool(get_password_hash, request.password)
     )
     
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     
     # Create access token
-    access_token = create_access_token(
-        data={"sub": str(user.id)},
-        expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    )
+    access_token = create_access_token(data={"sub": str(user.id)})
     
     return TokenResponse(
         access_token=access_token,
-        user_id=str(user.id),
+        user_id=user.id,
         name=user.name,
         email=user.email
     )
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(request: LoginRequest, db: Session = Depends(get_db)):
+async def login(request: LoginRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Login with email and password.
     
@@ -98,7 +99,8 @@ def login(request: LoginRequest, db: Session = Depends(get_db)):
     - Returns JWT access token
     """
     # Find user by email
-    user = db.query(User).filter(User.email == request.email).first()
+    result = await db.execute(select(User).where(User.email == request.email))
+    user = result.scalar_one_or_none()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -106,36 +108,33 @@ def login(request: LoginRequest, db: Session = Depends(get_db)):
         )
     
     # Verify password
-    if not verify_password(request.password, user.password_hash):
+    if not await run_in_threadpool(verify_password, request.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
         )
     
+    # Transparently upgrade legacy bcrypt / outdated Argon2 hashes
+    if password_needs_rehash(user.password_hash):
+        user.password_hash = await run_in_threadpool(get_password_hash, request.password)
+        await db.commit()
+    
     # Create access token
-    access_token = create_access_token(
-        data={"sub": str(user.id)},
-        expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    )
+    access_token = create_access_token(data={"sub": str(user.id)})
     
     return TokenResponse(
         access_token=access_token,
-        user_id=str(user.id),
+        user_id=user.id,
         name=user.name,
         email=user.email
     )
 
 
 @router.get("/me", response_model=UserResponse)
-def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(current_user = Depends(get_current_user)):
     """
     Get current authenticated user information.
     
     Protected endpoint - requires valid JWT token.
     """
-    return UserResponse(
-        id=str(current_user.id),
-        name=current_user.name,
-        email=current_user.email,
-        created_at=current_user.created_at.isoformat()
-    )
+    return UserResponse.model_validate(current_user)
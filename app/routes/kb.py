@@ -1,34 +1,55 @@
 """Knowledge base routes."""
+import asyncio
+import hashlib
+import logging
+import multiprocessing
 import os
+import shutil
 import uuid
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Optional
+from uuid import UUID
 from pathlib import Path
+from urllib.parse import quote
 import aiofiles
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, Response
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from pydantic import BaseModel
 from datetime import datetime
 
-from app.db.sessions import get_db
-from app.models.user import User
+from app.db.sessions import SessionLocal, get_db, get_async_db
 from app.models.knowledge_base import KnowledgeBase
 from app.models.document import Document
 from app.models.chunk import Chunk
 from app.models.question_bank import QuestionBank
-from app.core.security import get_current_user
-from app.utils.file_processor import FileProcessor
-from app.utils.text_chunker import TextChunker
-from app.services.openai_service import OpenAIService
+from app.models.parsed_content import ParsedContent
+from app.core.config import settings
+from app.core.security import get_current_user_id
+from app.utils.file_processor import FileProcessor, extract_and_chunk
+from app.services.openai_service import get_openai_service
 from app.services.teach_builder import TeachingModuleBuilder
 
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/kb", tags=["Knowledge Base"])
 
 
 # Configuration
 UPLOAD_DIR = Path("uploads")
 UPLOAD_DIR.mkdir(exist_ok=True)
+UPLOAD_COPY_CHUNK_SIZE = 1024 * 1024  # bytes
+# Plain-text files up to this size are chunked in a thread: cheaper than
+# shipping them to a worker process
+INLINE_PARSE_MAX_BYTES = 64 * 1024
+INLINE_PARSE_EXTENSIONS = frozenset({'.txt', '.md'})
+_PARSE_POOL: Optional[ProcessPoolExecutor] = None
 
 
 # Request/Response schemas
@@ -38,25 +59,29 @@ class CreateKBRequest(BaseModel):
 
 
 class KBResponse(BaseModel):
-    id: str
-    user_id: str
+    id: UUID
+    user_id: UUID
     title: str
     description: Optional[str]
     status: str
-    created_at: str
+    created_at: datetime
+    question_bank_status: Optional[str] = None
     documents: Optional[List["DocumentResponse"]] = None
+    document_count: Optional[int] = None
+    chunk_count: Optional[int] = None
     
     class Config:
         from_attributes = True
 
 
 class KBDetailResponse(BaseModel):
-    id: str
-    user_id: str
+    id: UUID
+    user_id: UUID
     title: str
     description: Optional[str]
     status: str
-    created_at: str
+    created_at: datetime
+    question_bank_status: Optional[str] = None
     document_count: int
     chunk_count: int
     
@@ -70,7 +95,7 @@ class KBListResponse(BaseModel):
 
 
 class DocumentResponse(BaseModel):
-    id: str
+    id: UUID
     filename: str
     filesize: int
     download_url: str
@@ -79,67 +104,460 @@ class DocumentResponse(BaseModel):
         from_attributes = True
 
 
-def _generate_and_save_question_bank(kb_id: str, db: Session) -> bool:
+def _load_question_bank_chunks(db: Session, kb_id: str):
+    """Load the chunk columns the question bank prompt uses for a KB."""
+    # The fallbacks are applied in SQL and the row mappings are handed to the
+    # service as-is (they support the dict-style access it uses)
+    return db.execute(
+        select(
+            Chunk.text,
+            func.coalesce(Chunk.topic, "General").label("topic"),
+            func.coalesce(Chunk.source_file, "Unknown").label("source_file")
+        )
+        .where(Chunk.kb_id == kb_id)
+    ).mappings().all()
+
+
+def _save_question_bank(db: Session, kb_id: str, rows: List[dict], replace: bool) -> None:
+    """Insert generated questions, replacing the existing bank if asked, and commit."""
+    if replace:
+        db.execute(delete(QuestionBank).where(QuestionBank.kb_id == kb_id))
+    QuestionBank.bulk_create(db, rows)
+    db.commit()
+
+
+async def _generate_and_save_question_bank(kb_id: str, db: Session, replace: bool = False) -> bool:
     """
     Generate and save question bank for a knowledge base.
     
     Args:
         kb_id: Knowledge base ID
         db: Database session
+        replace: Delete the existing question bank in the same transaction that
+            inserts the new one, so a failed generation leaves it intact
         
+    Database work is blocking, so it runs in the threadpool; only the LLM
+    call is awaited on the event loop.
+    
     Returns:
         True if successful, False otherwise
     """
     try:
-        # Get all chunks for this KB
-        chunks = db.query(Chunk).filter(Chunk.kb_id == kb_id).all()
+        chunks_content = await run_in_threadpool(_load_question_bank_chunks, db, kb_id)
         
-        if not chunks:
-            print(f"No chunks found for KB {kb_id}, skipping question bank generation")
+        if not chunks_content:
+            logger.info("No chunks found for KB %s, skipping question bank generation", kb_id)
             return False
         
-        # Prepare chunk data for OpenAI
-        chunks_content = [
-            {
-                "text": chunk.text,
-                "topic": chunk.topic or "General",
-                "source_file": chunk.source_file or "Unknown"
-            }
-            for chunk in chunks[:100]  # Limit to 100 chunks to stay within context window
-        ]
-        
         # Generate question bank using OpenAI
-        openai_service = OpenAIService()
-        question_bank_data = openai_service.generate_question_bank(chunks_content)
+        openai_service = get_openai_service()
+        question_bank_data = await openai_service.generate_question_bank(chunks_content)
         
         # Save questions to database
+        rows = []
         for difficulty_level, questions in question_bank_data.items():
             difficulty = difficulty_level.upper()  # EASY, MEDIUM, HARD
             
             for q_data in questions:
-                question = QuestionBank(
+                rows.append(dict(
                     kb_id=kb_id,
                     question_text=q_data['question_text'],
                     correct_answer=q_data['correct_answer'],
                     options=q_data.get('options'),
                     difficulty=difficulty
-                )
-                db.add(question)
-        
-        db.commit()
-        print(f"Successfully generated question bank for KB {kb_id}")
+                ))
+        await run_in_threadpool(_save_question_bank, db, kb_id, rows, replace)
+        logger.info("Generated question bank for KB %s", kb_id)
         return True
         
-    except Exception as e:
-        print(f"Error generating question bank for KB {kb_id}: {str(e)}")
-        db.rollback()
+    except Exception:
+        logger.exception("Error generating question bank for KB %s", kb_id)
+        await run_in_threadpool(db.rollback)
         return False
 
 
+def _set_question_bank_status(db: Session, kb_id: UUID, generated: bool) -> None:
+    """Record whether question bank generation succeeded, and commit."""
+    db.execute(
+        update(KnowledgeBase)
+        .where(KnowledgeBase.id == kb_id)
+        .values(question_bank_status="COMPLETED" if generated else "FAILED")
+    )
+    db.commit()
+
+
+async def _build_kb_content(kb_id: UUID, replace_question_bank: bool = False) -> None:
+    """
+    Background job: generate the question bank and teaching modules for a KB.
+    
+    Runs after the upload response has been sent, so it uses its own session;
+    its blocking session calls go through the threadpool. The outcome is recorded in `KnowledgeBase.question_bank_status`.
+    
+    Args:
+        kb_id: Knowledge base ID
+        replace_question_bank: Replace the existing question bank (new content
+            was added to an existing KB)
+    """
+    db = SessionLocal()
+    try:
+        generated = await _generate_and_save_question_bank(
+            str(kb_id), db, replace=replace_question_bank
+        )
+        await run_in_threadpool(_set_question_bank_status, db, kb_id, generated)
+        
+        # Build teaching modules and concepts (best-effort); the builder makes
+        # blocking LLM calls, so keep it off the event loop
+        try:
+            builder = TeachingModuleBuilder(db)
+            await run_in_threadpool(builder.build_for_kb, kb_id, force=False)
+        except Exception:
+            logger.exception("Error building teaching modules for KB %s", kb_id)
+    finally:
+        await run_in_threadpool(db.close)
+
+
+async def _save_upload(upload_file: UploadFile, upload_dir: Path):
+    """
+    Write an uploaded file to disk, hashing its content as it streams.
+    
+    Returns:
+        (file_path, filesize, content_hash)
+    
+    Raises:
+        HTTPException 413: If the file exceeds MAX_UPLOAD_BYTES
+    """
+    file_path = upload_dir / upload_file.filename
+    filesize = 0
+    hasher = hashlib.blake2b(digest_size=16)
+    
+    # Copy in fixed-size pieces so memory stays bounded for large files
+    async with aiofiles.open(file_path, "wb") as buffer:
+        while content := await upload_file.read(UPLOAD_COPY_CHUNK_SIZE):
+            filesize += len(content)
+            if filesize > settings.MAX_UPLOAD_BYTES:
+                break
+            await buffer.write(content)
+            hasher.update(content)
+    
+    if filesize > settings.MAX_UPLOAD_BYTES:
+        file_path.unlink(missing_ok=True)
+        raise _file_too_large([upload_file.filename])
+    
+    return file_path, filesize, hasher.hexdigest()
+
+
+def _parse_pool() -> ProcessPoolExecutor:
+    """Return the worker-process pool for parsing uploads, creating it on first use."""
+    global _PARSE_POOL
+    if _PARSE_POOL is None:
+        # spawn rather than fork: the API process runs threads (DB pools,
+        # threadpool) that must not be copied into the workers
+        _PARSE_POOL = ProcessPoolExecutor(
+            max_workers=os.cpu_count(),
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _PARSE_POOL
+
+
+def shutdown_parse_pool() -> None:
+    """Stop the parsing worker processes (called on application shutdown)."""
+    global _PARSE_POOL
+    if _PARSE_POOL is not None:
+        _PARSE_POOL.shutdown(wait=False, cancel_futures=True)
+        _PARSE_POOL = None
+
+
+async def _chunk_saved_file(file_path: Path, filename: str, cached_text: Optional[str]):
+    """
+    Extract and chunk a saved file in a worker process.
+    
+    Parsing and chunking are CPU-bound Python, so they run in the process pool
+    where files are processed in parallel and the event loop stays free;
+    callers gather this over all files. Small text files skip the pool.
+    
+    Returns:
+        (text, chunks) where text is None and chunks is empty if the file
+        could not be processed
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        if (
+            Path(filename).suffix.lower() in INLINE_PARSE_EXTENSIONS
+            and file_path.stat().st_size <= INLINE_PARSE_MAX_BYTES
+        ):
+            return await run_in_threadpool(
+                extract_and_chunk, str(file_path), filename, cached_text
+            )
+        return await loop.run_in_executor(
+            _parse_pool(), extract_and_chunk, str(file_path), filename, cached_text
+        )
+    except ValueError:
+        # File processing error - log and continue with other files
+        logger.warning("Error processing %s", filename, exc_info=True)
+        return None, []
+
+
+def _add_documents(db: Session, kb_id, saved: List[tuple]) -> List[tuple]:
+    """
+    Add a Document for each saved upload to the session (uncommitted).
+    
+    Document ids are assigned up front so the background job can attach
+    chunks to them without reloading the rows.
+    
+    Args:
+        saved: (filename, file_path, filesize, content_hash) per uploaded file
+    
+    Returns:
+        (document_id, filename, file_path, content_hash) per uploaded file
+    """
+    documents = [
+        Document(
+            id=uuid.uuid4(),
+            kb_id=kb_id,
+            filename=filename,
+            s3_path=str(file_path),  # Using local path for now, can be S3 URL later
+            filesize=filesize
+        )
+        for filename, file_path, filesize, _ in saved
+    ]
+    db.add_all(documents)
+    return [
+        (document.id, filename, file_path, content_hash)
+        for document, (filename, file_path, _, content_hash) in zip(documents, saved)
+    ]
+
+
+def _add_chunks(db: Session, kb_id, documents: List[tuple]) -> int:
+    """
+    Add every document's chunks to the session in one INSERT (uncommitted).
+    
+    Each chunk records its position in the document as chunk_index.
+    
+    Args:
+        documents: (document_id, chunks) per document
+    
+    Returns:
+        Number of chunks created
+    """
+    chunk_rows = [
+        dict(
+            kb_id=kb_id,
+            document_id=document_id,
+            chunk_index=chunk_index,
+            text=chunk_data['text'],
+            topic=chunk_data.get('topic'),
+            section=chunk_data.get('section'),
+            page_number=chunk_data.get('page_number'),
+            keywords=chunk_data.get('keywords'),
+            source_file=chunk_data.get('source_file')
+        )
+        for document_id, chunks in documents
+        for chunk_index, chunk_data in enumerate(chunks)
+    ]
+    Chunk.bulk_create(db, chunk_rows)
+    return len(chunk_rows)
+
+
+def _file_too_large(filenames: List[str]) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Files exceed the {settings.MAX_UPLOAD_BYTES // (1024 * 1024)} MB limit: "
+               f"{', '.join(filenames)}"
+    )
+
+
+def _validate_upload_files(files: List[UploadFile]) -> None:
+    """
+    Reject an upload with no files, unsupported formats or oversized files.
+    
+    Sizes are checked here when the client declared them; `_save_upload`
+    enforces the limit for the rest while streaming.
+    
+    Raises:
+        HTTPException 400: If no files provided, duplicate filenames or
+            unsupported file format
+        HTTPException 413: If a file's declared size exceeds MAX_UPLOAD_BYTES
+    """
+    if not files:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No files provided"
+        )
+    
+    # Files are saved concurrently under their own names, so each name must
+    # appear once
+    duplicate_files = [
+        filename for filename, count in Counter(file.filename for file in files).items()
+        if count > 1
+    ]
+    
+    if duplicate_files:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Duplicate filenames: {', '.join(duplicate_files)}"
+        )
+    
+    unsupported_files = [
+        file.filename for file in files
+        if Path(file.filename).suffix.lower() not in FileProcessor.SUPPORTED_EXTENSIONS
+    ]
+    
+    if unsupported_files:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported file formats: {', '.join(unsupported_files)}. "
+                   f"Supported: PDF, DOCX, TXT, MD"
+        )
+    
+    oversized_files = [
+        file.filename for file in files
+        if file.size is not None and file.size > settings.MAX_UPLOAD_BYTES
+    ]
+    
+    if oversized_files:
+        raise _file_too_large(oversized_files)
+
+
+async def _save_uploads(kb: KnowledgeBase, files: List[UploadFile], db: Session) -> List[tuple]:
+    """
+    Save uploaded files to disk and add their documents to a KB (uncommitted).
+    
+    Files are written concurrently (filenames are unique, see
+    `_validate_upload_files`); parsing is left to `_process_uploads`. If any
+    file fails, every file of the upload is removed before the error is raised.
+    
+    Returns:
+        (document_id, filename, file_path, content_hash) per uploaded file
+    """
+    # Create user-specific upload directory
+    user_upload_dir = UPLOAD_DIR / str(kb.user_id) / str(kb.id)
+    user_upload_dir.mkdir(parents=True, exist_ok=True)
+    
+    # Let every write finish before cleaning up, so none is still writing
+    saved = await asyncio.gather(
+        *(_save_upload(upload_file, user_upload_dir) for upload_file in files),
+        return_exceptions=True
+    )
+    
+    errors = [result for result in saved if isinstance(result, BaseException)]
+    if errors:
+        for upload_file in files:
+            (user_upload_dir / upload_file.filename).unlink(missing_ok=True)
+        # Prefer a client error (e.g. 413) over an unexpected failure
+        raise next((e for e in errors if isinstance(e, HTTPException)), errors[0])
+    
+    return _add_documents(db, kb.id, [
+        (upload_file.filename, file_path, filesize, content_hash)
+        for upload_file, (file_path, filesize, content_hash) in zip(files, saved)
+    ])
+
+
+def _load_cached_texts(db: Session, hashes: set) -> dict:
+    """Map content hashes to text already extracted from identical files."""
+    return dict(db.execute(
+        select(ParsedContent.content_hash, ParsedContent.text)
+        .where(ParsedContent.content_hash.in_(hashes))
+    ).all())
+
+
+def _save_parsed_uploads(
+    db: Session, kb_id: UUID, uploads: List[tuple], parsed: List[tuple], cached_texts: dict
+) -> bool:
+    """
+    Record parsed text and chunks for a KB's uploads and update its status.
+    
+    Returns:
+        True if any chunks were produced (the KB is COMPLETED), False otherwise
+    """
+    new_texts = {
+        content_hash: text
+        for (_, _, _, content_hash), (text, _) in zip(uploads, parsed)
+        if text is not None and content_hash not in cached_texts
+    }
+    if new_texts:
+        db.execute(
+            pg_insert(ParsedContent)
+            .values([{"content_hash": h, "text": t} for h, t in new_texts.items()])
+            .on_conflict_do_nothing(index_elements=[ParsedContent.content_hash])
+        )
+    
+    total_chunks = _add_chunks(db, kb_id, [
+        (document_id, chunks)
+        for (document_id, _, _, _), (_, chunks) in zip(uploads, parsed)
+    ])
+    
+    completed = total_chunks > 0
+    db.execute(
+        update(KnowledgeBase)
+        .where(KnowledgeBase.id == kb_id)
+        .values(
+            status="COMPLETED" if completed else "FAILED",
+            question_bank_status="PENDING" if completed else KnowledgeBase.question_bank_status
+        )
+    )
+    db.commit()
+    return completed
+
+
+def _mark_kb_failed(db: Session, kb_id: UUID) -> None:
+    """Discard uncommitted work, then mark the KB failed."""
+    db.rollback()
+    db.execute(
+        update(KnowledgeBase)
+        .where(KnowledgeBase.id == kb_id)
+        .values(status="FAILED")
+    )
+    db.commit()
+
+
+async def _process_uploads(
+    kb_id: UUID, uploads: List[tuple], replace_question_bank: bool = False
+) -> None:
+    """
+    Background job: parse and chunk saved uploads, then build the KB content.
+    
+    Runs after the 202 response has been sent, so it uses its own session;
+    its blocking session calls go through the threadpool. Files are parsed concurrently and their chunks recorded in upload order;
+    files whose content was parsed before reuse the cached text. The KB moves
+    from PROCESSING to COMPLETED, or FAILED if no chunks were produced.
+    
+    Args:
+        kb_id: Knowledge base ID
+        uploads: (document_id, filename, file_path, content_hash) per file,
+            as returned by `_save_uploads`
+        replace_question_bank: Replace the existing question bank (new content
+            was added to an existing KB)
+    """
+    db = SessionLocal()
+    try:
+        # Reuse text already extracted from identical files
+        hashes = {content_hash for _, _, _, content_hash in uploads}
+        cached_texts = await run_in_threadpool(_load_cached_texts, db, hashes)
+        
+        parsed = await asyncio.gather(*(
+            _chunk_saved_file(file_path, filename, cached_texts.get(content_hash))
+            for _, filename, file_path, content_hash in uploads
+        ))
+        
+        completed = await run_in_threadpool(
+            _save_parsed_uploads, db, kb_id, uploads, parsed, cached_texts
+        )
+    except Exception:
+        logger.exception("Error processing files for KB %s", kb_id)
+        await run_in_threadpool(_mark_kb_failed, db, kb_id)
+        return
+    finally:
+        await run_in_threadpool(db.close)
+    
+    # Generate question bank and teaching modules from the new chunks
+    if completed:
+        await _build_kb_content(kb_id, replace_question_bank=replace_question_bank)
+
+
 @router.post("/create", response_model=KBResponse, status_code=status.HTTP_201_CREATED)
 def create_knowledge_base(
     request: CreateKBRequest,
-    current_user: User = Depends(get_current_user),
+    current_user_id: UUID = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
     """
@@ -148,7 +566,7 @@ def create_knowledge_base(
     Protected endpoint - requires JWT authentication.
     """
     kb = KnowledgeBase(
-        user_id=current_user.id,
+        user_id=current_user_id,
         title=request.title,
         description=request.description,
         status="CREATED"
@@ -159,27 +577,31 @@ def create_knowledge_base(
     db.refresh(kb)
     
     return KBResponse(
-        id=str(kb.id),
-        user_id=str(kb.user_id),
+        id=kb.id,
+        user_id=kb.user_id,
         title=kb.title,
         description=kb.description,
         status=kb.status,
-        created_at=kb.created_at.isoformat()
+        created_at=kb.created_at
     )
 
 
-@router.post("/upload", response_model=KBResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/upload", response_model=KBResponse, status_code=status.HTTP_202_ACCEPTED)
 async def upload_knowledge_base(
+    background_tasks: BackgroundTasks,
     title: str = Form(...),
     description: Optional[str] = Form(None),
     files: List[UploadFile] = File(...),
-    current_user: User = Depends(get_current_user),
+    current_user_id: UUID = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
     """
     Create a knowledge base by uploading files.
     
-    Accepts multiple files (PDF, DOCX, TXT, MD) and processes them into chunks.
+    Accepts multiple files (PDF, DOCX, TXT, MD) and saves them; parsing and
+    chunking run in the background after the response is sent. The KB is
+    returned with status PROCESSING; poll GET /kb/{kb_id} for COMPLETED or
+    FAILED.
     
     Protected endpoint - requires JWT authentication.
     
@@ -187,7 +609,8 @@ async def upload_knowledge_base(
         title: Title of the knowledge base
         description: Optional description
         files: List of files to upload (PDF, DOCX, TXT, MD)
-        current_user: Authenticated user
+        background_tasks: Runs file processing and content generation
+        current_user_id: Authenticated user's id
         db: Database session
         
     Returns:
@@ -195,160 +618,76 @@ async def upload_knowledge_base(
         
     Raises:
         HTTPException 400: If no files provided or unsupported file format
-        HTTPException 500: If processing fails
+        HTTPException 413: If a file exceeds MAX_UPLOAD_BYTES
+        HTTPException 500: If the files could not be saved
     """
-    if not files:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="No files provided"
-        )
-    
-    # Validate file formats
-    unsupported_files = []
-    for file in files:
-        if not FileProcessor.is_supported(file.filename):
-            unsupported_files.append(file.filename)
-    
-    if unsupported_files:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Unsupported file formats: {', '.join(unsupported_files)}. "
-                   f"Supported: PDF, DOCX, TXT, MD"
-        )
+    _validate_upload_files(files)
     
     # Create knowledge base
     kb = KnowledgeBase(
-        user_id=current_user.id,
+        user_id=current_user_id,
         title=title,
         description=description,
         status="PROCESSING"
     )
     
+    # The KB and its documents are committed in one transaction below
     db.add(kb)
-    db.commit()
-    db.refresh(kb)
+    db.flush()  # populate kb.id for the upload directory and document rows
     
     try:
-        # Create user-specific upload directory
-        user_upload_dir = UPLOAD_DIR / str(current_user.id) / str(kb.id)
-        user_upload_dir.mkdir(parents=True, exist_ok=True)
-        
-        total_chunks = 0
-        
-        # Process each file
-        for upload_file in files:
-            # Save file to disk
-            file_path = user_upload_dir / upload_file.filename
-            
-            async with aiofiles.open(file_path, "wb") as buffer:
-                content = await upload_file.read()
-                await buffer.write(content)
-            
-            # Create document record
-            document = Document(
-                kb_id=kb.id,
-                filename=upload_file.filename,
-                s3_path=str(file_path)  # Using local path for now, can be S3 URL later
-            )
-            db.add(document)
-            db.commit()
-            db.refresh(document)
-            
-            try:
-                # Extract text from file
-                text, _ = FileProcessor.extract_text(str(file_path))
-                
-                if not text.strip():
-                    continue  # Skip empty files
-                
-                # Chunk the text
-                chunks = TextChunker.chunk_text(
-                    text=text,
-                    chunk_size=1000,
-                    overlap=200,
-                    source_filename=upload_file.filename
-                )
-                
-                # Save chunks to database
-                for chunk_data in chunks:
-                    chunk = Chunk(
-                        kb_id=kb.id,
-                        document_id=document.id,
-                        text=chunk_data['text'],
-                        topic=chunk_data.get('topic'),
-                        section=chunk_data.get('section'),
-                        page_number=chunk_data.get('page_number'),
-                        keywords=chunk_data.get('keywords'),
-                        source_file=chunk_data.get('source_file')
-                    )
-                    db.add(chunk)
-                    total_chunks += 1
-                
-                db.commit()
-                
-            except ValueError as e:
-                # File processing error - log and continue with other files
-                print(f"Error processing {upload_file.filename}: {str(e)}")
-                continue
-        
-        # Update KB status
-        kb.status = "COMPLETED" if total_chunks > 0 else "FAILED"
+        uploads = await _save_uploads(kb, files, db)
         db.commit()
         db.refresh(kb)
-        
-        # Generate question bank if KB was successfully created
-        if kb.status == "COMPLETED":
-            _generate_and_save_question_bank(str(kb.id), db)
-            # Build teaching modules and concepts (non-blocking best-effort)
-            try:
-                builder = TeachingModuleBuilder(db)
-                builder.build_for_kb(kb.id, force=False)
-            except Exception as e:
-                print(f"Error building teaching modules for KB {kb.id}: {e}")
-        
-        return KBResponse(
-            id=str(kb.id),
-            user_id=str(kb.user_id),
-            title=kb.title,
-            description=kb.description,
-            status=kb.status,
-            created_at=kb.created_at.isoformat()
-        )
-        
+    except HTTPException:
+        db.rollback()
+        raise
     except Exception as e:
-        # Update status to failed
-        kb.status = "FAILED"
-        db.commit()
+        # Nothing was committed, so the KB is discarded along with its documents
+        db.rollback()
         
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error processing files: {str(e)}"
+            detail=f"Error saving files: {str(e)}"
         )
+    
+    # Parse, chunk and generate content after the response is sent
+    background_tasks.add_task(_process_uploads, kb.id, uploads)
+    
+    return KBResponse(
+        id=kb.id,
+        user_id=kb.user_id,
+        title=kb.title,
+        description=kb.description,
+        status=kb.status,
+        created_at=kb.created_at,
+        question_bank_status=kb.question_bank_status
+    )
 
 
-@router.post("/{kb_id}/upload", response_model=KBResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/{kb_id}/upload", response_model=KBResponse, status_code=status.HTTP_202_ACCEPTED)
 async def upload_to_existing_kb(
-    kb_id: str,
+    kb_id: UUID,
+    background_tasks: BackgroundTasks,
     files: List[UploadFile] = File(...),
-    current_user: User = Depends(get_current_user),
+    current_user_id: UUID = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
     """
     Upload files and attach them to an existing knowledge base.
 
+    Files are processed in the background as in `upload_knowledge_base`; the
+    KB is PROCESSING until they are chunked.
+
     Protected endpoint - requires JWT authentication.
     """
-    if not files:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="No files provided"
-        )
+    _validate_upload_files(files)
 
     # Find KB and check ownership
-    kb = db.query(KnowledgeBase).filter(
+    kb = db.execute(select(KnowledgeBase).where(
         KnowledgeBase.id == kb_id,
-        KnowledgeBase.user_id == current_user.id
-    ).first()
+        KnowledgeBase.user_id == current_user_id
+    )).scalar_one_or_none()
 
     if not kb:
         raise HTTPException(
@@ -356,172 +695,129 @@ async def upload_to_existing_kb(
             detail="Knowledge base not found"
         )
 
-    # Validate file formats
-    unsupported_files = []
-    for file in files:
-        if not FileProcessor.is_supported(file.filename):
-            unsupported_files.append(file.filename)
-
-    if unsupported_files:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Unsupported file formats: {', '.join(unsupported_files)}. "
-                   f"Supported: PDF, DOCX, TXT, MD"
-        )
-
-    # Mark KB processing
-    kb.status = "PROCESSING"
-    db.commit()
-
+    # Documents and the status update are committed together
     try:
-        user_upload_dir = UPLOAD_DIR / str(current_user.id) / str(kb.id)
-        user_upload_dir.mkdir(parents=True, exist_ok=True)
-
-        total_chunks = 0
-
-        for upload_file in files:
-            file_path = user_upload_dir / upload_file.filename
-
-            async with aiofiles.open(file_path, "wb") as buffer:
-                content = await upload_file.read()
-                await buffer.write(content)
-
-            document = Document(
-                kb_id=kb.id,
-                filename=upload_file.filename,
-                s3_path=str(file_path)
-            )
-            db.add(document)
-            db.commit()
-            db.refresh(document)
-
-            try:
-                text, _ = FileProcessor.extract_text(str(file_path))
-
-                if not text.strip():
-                    continue
-
-                chunks = TextChunker.chunk_text(
-                    text=text,
-                    chunk_size=1000,
-                    overlap=200,
-                    source_filename=upload_file.filename
-                )
-
-                for chunk_data in chunks:
-                    chunk = Chunk(
-                        kb_id=kb.id,
-                        document_id=document.id,
-                        text=chunk_data['text'],
-                        topic=chunk_data.get('topic'),
-                        section=chunk_data.get('section'),
-                        page_number=chunk_data.get('page_number'),
-                        keywords=chunk_data.get('keywords'),
-                        source_file=chunk_data.get('source_file')
-                    )
-                    db.add(chunk)
-                    total_chunks += 1
-
-                db.commit()
-
-            except ValueError as e:
-                print(f"Error processing {upload_file.filename}: {str(e)}")
-                continue
-
-        kb.status = "COMPLETED" if total_chunks > 0 else "FAILED"
+        uploads = await _save_uploads(kb, files, db)
+        kb.status = "PROCESSING"
         db.commit()
         db.refresh(kb)
-        
-        # Regenerate question bank since new content was added
-        if kb.status == "COMPLETED":
-            # First, delete existing question bank for this KB
-            db.query(QuestionBank).filter(QuestionBank.kb_id == kb.id).delete()
-            db.commit()
-            # Generate new question bank
-            _generate_and_save_question_bank(str(kb.id), db)
-            # Build/update teaching modules and concepts (best-effort)
-            try:
-                builder = TeachingModuleBuilder(db)
-                builder.build_for_kb(kb.id, force=False)
-            except Exception as e:
-                print(f"Error building teaching modules for KB {kb.id}: {e}")
-
-        return KBResponse(
-            id=str(kb.id),
-            user_id=str(kb.user_id),
-            title=kb.title,
-            description=kb.description,
-            status=kb.status,
-            created_at=kb.created_at.isoformat()
-        )
-
+    except HTTPException:
+        db.rollback()
+        raise
     except Exception as e:
-        kb.status = "FAILED"
-        db.commit()
+        # Discard uncommitted documents; the KB itself is unchanged
+        db.rollback()
 
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error processing files: {str(e)}"
+            detail=f"Error saving files: {str(e)}"
         )
 
+    # Regenerate question bank once the new content is chunked; the existing
+    # bank stays usable until the background job replaces it
+    background_tasks.add_task(_process_uploads, kb.id, uploads, replace_question_bank=True)
+
+    return KBResponse(
+        id=kb.id,
+        user_id=kb.user_id,
+        title=kb.title,
+        description=kb.description,
+        status=kb.status,
+        created_at=kb.created_at,
+        question_bank_status=kb.question_bank_status
+    )
+
 
 @router.get("/list", response_model=KBListResponse)
-def list_knowledge_bases(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def list_knowledge_bases(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    current_user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    List all knowledge bases for the current user.
+    List the current user's knowledge bases, newest first, one page at a time.
+    
+    `total` is the number of KBs the user owns, not the size of the page.
     
     Protected endpoint - requires JWT authentication.
     """
-    kbs = db.query(KnowledgeBase).filter(
-        KnowledgeBase.user_id == current_user.id
-    ).order_by(KnowledgeBase.created_at.desc()).all()
+    # Documents for all KBs are loaded in one extra IN query, not one per KB.
+    # Chunk counts ride along as a correlated subquery (as in
+    # get_knowledge_base) so clients need no per-KB detail call.
+    chunk_count = (
+        select(func.count(Chunk.id))
+        .where(Chunk.kb_id == KnowledgeBase.id)
+        .scalar_subquery()
+    )
+    # The total rides along as a window count so a page needs no second query
+    rows = (await db.execute(
+        select(KnowledgeBase, chunk_count, func.count().over())
+        .options(selectinload(KnowledgeBase.documents))
+        .where(KnowledgeBase.user_id == current_user_id)
+        .order_by(KnowledgeBase.created_at.desc())
+        .offset(skip)
+        .limit(limit)
+    )).all()
+    
+    if rows:
+        total = rows[0][2]
+    elif skip:
+        # Paged past the end: no row to carry the window count
+        total = await db.scalar(
+            select(func.count(KnowledgeBase.id))
+            .where(KnowledgeBase.user_id == current_user_id)
+        )
+    else:
+        total = 0
     
     kb_responses = []
-    for kb in kbs:
-        # fetch documents for this KB
-        docs = db.query(Document).filter(Document.kb_id == kb.id).all()
+    for kb, chunk_count, _ in rows:
         doc_list = []
-        for doc in docs:
-            try:
-                p = Path(doc.s3_path)
-                filesize = p.stat().st_size if p.exists() else 0
-            except Exception:
-                filesize = 0
+        for doc in kb.documents:
+            filesize = doc.filesize
+            if filesize is None:
+                # Uploaded before sizes were recorded
+                try:
+                    p = Path(doc.s3_path)
+                    filesize = p.stat().st_size if p.exists() else 0
+                except Exception:
+                    filesize = 0
 
             download_url = f"/kb/{kb.id}/documents/{doc.id}/download"
-            doc_list.append({
-                "id": str(doc.id),
-                "filename": doc.filename,
-                "filesize": filesize,
-                "download_url": download_url
-            })
+            doc_list.append(DocumentResponse(
+                id=doc.id,
+                filename=doc.filename,
+                filesize=filesize,
+                download_url=download_url
+            ))
 
         kb_responses.append(
             KBResponse(
-                id=str(kb.id),
-                user_id=str(kb.user_id),
+                id=kb.id,
+                user_id=kb.user_id,
                 title=kb.title,
                 description=kb.description,
                 status=kb.status,
-                created_at=kb.created_at.isoformat(),
-                documents=doc_list
+                created_at=kb.created_at,
+                question_bank_status=kb.question_bank_status,
+                documents=doc_list,
+                document_count=len(doc_list),
+                chunk_count=chunk_count
             )
         )
     
     return KBListResponse(
         knowledge_bases=kb_responses,
-        total=len(kb_responses)
+        total=total
     )
 
 
 @router.get("/{kb_id}", response_model=KBDetailResponse)
-def get_knowledge_base(
-    kb_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_knowledge_base(
+    kb_id: UUID,
+    current_user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get a specific knowledge base by ID with detailed statistics.
@@ -529,28 +825,42 @@ def get_knowledge_base(
     Protected endpoint - requires JWT authentication.
     Only returns knowledge bases owned by the current user.
     """
-    kb = db.query(KnowledgeBase).filter(
-        KnowledgeBase.id == kb_id,
-        KnowledgeBase.user_id == current_user.id
-    ).first()
+    # Fetch the KB and both counts in one round-trip. Scalar subqueries rather
+    # than joins, which would multiply documents by chunks before counting.
+    document_count = (
+        select(func.count(Document.id))
+        .where(Document.kb_id == KnowledgeBase.id)
+        .scalar_subquery()
+    )
+    chunk_count = (
+        select(func.count(Chunk.id))
+        .where(Chunk.kb_id == KnowledgeBase.id)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        select(KnowledgeBase, document_count, chunk_count).where(
+            KnowledgeBase.id == kb_id,
+            KnowledgeBase.user_id == current_user_id
+        )
+    )
+    row = result.one_or_none()
     
-    if not kb:
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Knowledge base not found"
         )
     
-    # Count documents and chunks
-    document_count = db.query(Document).filter(Document.kb_id == kb.id).count()
-    chunk_count = db.query(Chunk).filter(Chunk.kb_id == kb.id).count()
+    kb, document_count, chunk_count = row
     
     return KBDetailResponse(
-        id=str(kb.id),
-        user_id=str(kb.user_id),
+        id=kb.id,
+        user_id=kb.user_id,
         title=kb.title,
         description=kb.description,
         status=kb.status,
-        created_at=kb.created_at.isoformat(),
+        created_at=kb.created_at,
+        question_bank_status=kb.question_bank_status,
         document_count=document_count,
         chunk_count=chunk_count
     )
@@ -558,29 +868,24 @@ def get_knowledge_base(
 
 @router.get("/{kb_id}/documents/{doc_id}/download")
 def download_document(
-    kb_id: str,
-    doc_id: str,
-    current_user: User = Depends(get_current_user),
+    kb_id: UUID,
+    doc_id: UUID,
+    current_user_id: UUID = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
     """
     Download a document belonging to a knowledge base (owner-only).
     """
-    kb = db.query(KnowledgeBase).filter(
-        KnowledgeBase.id == kb_id,
-        KnowledgeBase.user_id == current_user.id
-    ).first()
-
-    if not kb:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Knowledge base not found"
+    # Ownership is checked through the join, in the same query as the lookup
+    document = db.execute(
+        select(Document)
+        .join(KnowledgeBase, Document.kb_id == KnowledgeBase.id)
+        .where(
+            Document.id == doc_id,
+            KnowledgeBase.id == kb_id,
+            KnowledgeBase.user_id == current_user_id
         )
-
-    document = db.query(Document).filter(
-        Document.id == doc_id,
-        Document.kb_id == kb.id
-    ).first()
+    ).scalar_one_or_none()
 
     if not document:
         raise HTTPException(
@@ -589,40 +894,74 @@ def download_document(
         )
 
     file_path = Path(document.s3_path)
-    if not file_path.exists():
+    try:
+        # FileResponse would stat the file again; hand it this result instead
+        stat_result = file_path.stat()
+    except FileNotFoundError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="File not found on server"
         )
 
-    return FileResponse(path=str(file_path), media_type='application/octet-stream', filename=document.filename)
+    response = FileResponse(
+        path=str(file_path),
+        media_type='application/octet-stream',
+        filename=document.filename,
+        stat_result=stat_result
+    )
+
+    # Behind nginx, let the proxy send the file itself (zero-copy sendfile);
+    # the Content-Disposition FileResponse built (RFC 5987 for non-ASCII
+    # names) is reused
+    if settings.DOWNLOAD_ACCEL_REDIRECT_PREFIX:
+        # Percent-encoded: nginx decodes the URI, and the header must be latin-1
+        relative_path = quote(file_path.relative_to(UPLOAD_DIR).as_posix())
+        return Response(
+            media_type='application/octet-stream',
+            headers={
+                "X-Accel-Redirect": settings.DOWNLOAD_ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + relative_path,
+                "Content-Disposition": response.headers["content-disposition"],
+            }
+        )
+
+    return response
 
 
 @router.delete("/{kb_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_knowledge_base(
-    kb_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def delete_knowledge_base(
+    kb_id: UUID,
+    background_tasks: BackgroundTasks,
+    current_user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete a knowledge base.
     
     Protected endpoint - requires JWT authentication.
     Only allows deletion of knowledge bases owned by the current user.
-    Cascades to all related documents, chunks, and quizzes.
+    Cascades to all related documents, chunks, and quizzes, and removes the
+    uploaded files from disk.
     """
-    kb = db.query(KnowledgeBase).filter(
-        KnowledgeBase.id == kb_id,
-        KnowledgeBase.user_id == current_user.id
-    ).first()
+    # A single DELETE; the ON DELETE CASCADE foreign keys remove dependent
+    # rows in the database instead of the ORM loading them first
+    result = await db.execute(
+        delete(KnowledgeBase).where(
+            KnowledgeBase.id == kb_id,
+            KnowledgeBase.user_id == current_user_id
+        )
+    )
     
-    if not kb:
+    if result.rowcount == 0:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Knowledge base not found"
         )
     
-    db.delete(kb)
-    db.commit()
+    await db.commit()
+    
+    # Uploaded files are removed after the response is sent
+    background_tasks.add_task(
+        shutil.rmtree, UPLOAD_DIR / str(current_user_id) / str(kb_id), ignore_errors=True
+    )
     
     return None
@@ -1,27 +1,78 @@
 """Quiz routes."""
-from typing import List, Optional
+import random
+import threading
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional
+from uuid import UUID
+from cachetools import TTLCache
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, load_only
+from sqlalchemy import exists, literal, select, union_all
 from pydantic import BaseModel, Field
 
-from app.db.sessions import get_db
-from app.models.user import User
+from app.db.sessions import get_db, get_async_db
 from app.models.knowledge_base import KnowledgeBase
 from app.models.chunk import Chunk
 from app.models.quiz import Quiz, QuizQuestion
 from app.models.quiz import QuizAnswer, QuizSummary
 from app.models.question_bank import QuestionBank
-from app.core.security import get_current_user
-from app.services.openai_service import OpenAIService
+from app.core.security import get_current_user_id
+from app.utils.ids import uuid7
 
 
 router = APIRouter(prefix="/quiz", tags=["Quiz"])
 
+# Quiz answers never change after creation, so submissions reuse their
+# normalized form from memory. Entries are (owner id, value) and the owner is
+# checked on every hit.
+QUIZ_CACHE_TTL_SECONDS = 300
+_grading_cache: TTLCache = TTLCache(maxsize=2048, ttl=QUIZ_CACHE_TTL_SECONDS)
+_quiz_cache_lock = threading.Lock()
+
+
+def _cached_for_user(cache: TTLCache, quiz_id: UUID, user_id: UUID):
+    """Return the cached response for `quiz_id` if it belongs to `user_id`."""
+    with _quiz_cache_lock:
+        entry = cache.get(quiz_id)
+    if entry is not None and entry[0] == user_id:
+        return entry[1]
+    return None
+
+
+def _cache_quiz(cache: TTLCache, quiz_id: UUID, user_id: UUID, response) -> None:
+    with _quiz_cache_lock:
+        cache[quiz_id] = (user_id, response)
+
+
+class _GradingKey(NamedTuple):
+    """A quiz question's answer, normalized once for grading."""
+    id: UUID
+    correct_answer: Optional[str]
+    answer_lower: Optional[str]  # stripped, lowercased correct_answer
+    letter: Optional[str]  # set when the answer is an option letter (A/B/C/...)
+    option_letters: Dict[str, str]  # normalized option text -> letter, first match wins
+
+
+def _grading_key(q) -> _GradingKey:
+    stored = q.correct_answer.strip() if q.correct_answer is not None else None
+    letters = {}
+    for idx, opt in enumerate(q.options or []):
+        if opt:
+            letters.setdefault(opt.strip().lower(), chr(65 + idx))
+    letter_mode = stored is not None and bool(q.options) and len(stored) == 1 and stored.isalpha()
+    return _GradingKey(
+        id=q.id,
+        correct_answer=q.correct_answer,
+        answer_lower=stored.lower() if stored is not None else None,
+        letter=stored.upper() if letter_mode else None,
+        option_letters=letters
+    )
+
 
 # Request/Response schemas
 class GenerateQuizRequest(BaseModel):
-    kb_id: str
+    kb_id: UUID
     num_questions: int = Field(default=5, ge=1, le=20)
     difficulty: str = Field(default="MEDIUM", pattern="^(EASY|MEDIUM|HARD|MIXED)$")
     topic_filter: Optional[str] = None
@@ -29,7 +80,7 @@ class GenerateQuizRequest(BaseModel):
 
 
 class QuestionResponse(BaseModel):
-    id: str
+    id: UUID
     question_text: str
     options: Optional[List[str]]
     difficulty: str
@@ -40,12 +91,12 @@ class QuestionResponse(BaseModel):
 
 
 class QuizResponse(BaseModel):
-    id: str
-    kb_id: str
-    user_id: str
+    id: UUID
+    kb_id: UUID
+    user_id: UUID
     difficulty: str
     num_questions: int
-    created_at: str
+    created_at: datetime
     questions: List[QuestionResponse]
     
     class Config:
@@ -53,7 +104,7 @@ class QuizResponse(BaseModel):
 
 
 class AnswerKeyResponse(BaseModel):
-    question_id: str
+    question_id: UUID
     question_text: str
     correct_answer: str
     options: Optional[List[str]]
@@ -74,7 +125,7 @@ class SubmitQuizRequest(BaseModel):
 
 
 class QuestionResult(BaseModel):
-    question_id: str
+    question_id: UUID
     correct_answer: Optional[str]
     user_answer: str
     is_correct: bool
@@ -82,18 +133,65 @@ class QuestionResult(BaseModel):
 
 
 class SubmitQuizResponse(BaseModel):
-    quiz_id: str
+    quiz_id: UUID
     total_questions: int
     correct_answers: int
     accuracy: float
     results: List[QuestionResult]
 
 
+async def _sample_question_bank(db: AsyncSession, kb_id: UUID, counts: Dict[str, int]) -> list:
+    """
+    Pick `counts[difficulty]` random bank questions per difficulty in one query.
+    
+    Each difficulty seeks to a random point in `random_key` order and reads
+    forward, wrapping around to the start of the order if it runs out, so the
+    (kb_id, difficulty, random_key) index serves every branch and nothing is
+    sorted in full.
+    
+    Returns:
+        Rows with question_text, correct_answer, options and difficulty,
+        grouped by difficulty in the order of `counts`
+    """
+    start = random.random()
+    branches = []
+    for difficulty, n in counts.items():
+        if n <= 0:
+            continue
+        base = select(
+            QuestionBank.question_text,
+            QuestionBank.correct_answer,
+            QuestionBank.options,
+            QuestionBank.difficulty,
+            QuestionBank.random_key
+        ).where(
+            QuestionBank.kb_id == kb_id,
+            QuestionBank.difficulty == difficulty
+        ).order_by(QuestionBank.random_key).limit(n)
+        branches.append(base.add_columns(literal(0).label("wrapped")).where(QuestionBank.random_key >= start))
+        branches.append(base.add_columns(literal(1).label("wrapped")).where(QuestionBank.random_key < start))
+    
+    if not branches:
+        return []
+    
+    rows = (await db.execute(union_all(*branches))).all()
+    order = list(counts)
+    rows.sort(key=lambda r: (order.index(r.difficulty), r.wrapped, r.random_key))
+    
+    selected = []
+    taken = dict.fromkeys(counts, 0)
+    for row in rows:
+        if taken[row.difficulty] < counts[row.difficulty]:
+            taken[row.difficulty] += 1
+            selected.append(row)
+    return selected
+
+
 @router.post("/generate", response_model=QuizWithAnswersResponse, status_code=status.HTTP_201_CREATED)
-def generate_quiz(
+async def generate_quiz(
     request: GenerateQuizRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Generate a quiz from pre-generated question bank.
@@ -108,7 +206,7 @@ def generate_quiz(
     
     Args:
         request: Quiz generation parameters
-        current_user: Authenticated user
+        current_user_id: Authenticated user's id
         db: Database session
         
     Returns:
@@ -120,12 +218,12 @@ def generate_quiz(
         HTTPException 500: Error generating quiz
     """
     # Verify KB exists and belongs to user
-    kb = db.query(KnowledgeBase).filter(
+    kb_owned = await db.scalar(select(exists().where(
         KnowledgeBase.id == request.kb_id,
-        KnowledgeBase.user_id == current_user.id
-    ).first()
+        KnowledgeBase.user_id == current_user_id
+    )))
     
-    if not kb:
+    if not kb_owned:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Knowledge base not found"
@@ -138,29 +236,12 @@ def generate_quiz(
             num_easy = request.num_questions // 3
             num_medium = request.num_questions // 3
             num_hard = request.num_questions - num_easy - num_medium
-            
-            easy_questions = db.query(QuestionBank).filter(
-                QuestionBank.kb_id == request.kb_id,
-                QuestionBank.difficulty == "EASY"
-            ).order_by(func.random()).limit(num_easy).all()
-            
-            medium_questions = db.query(QuestionBank).filter(
-                QuestionBank.kb_id == request.kb_id,
-                QuestionBank.difficulty == "MEDIUM"
-            ).order_by(func.random()).limit(num_medium).all()
-            
-            hard_questions = db.query(QuestionBank).filter(
-                QuestionBank.kb_id == request.kb_id,
-                QuestionBank.difficulty == "HARD"
-            ).order_by(func.random()).limit(num_hard).all()
-            
-            selected_questions = easy_questions + medium_questions + hard_questions
+            counts = {"EASY": num_easy, "MEDIUM": num_medium, "HARD": num_hard}
         else:
             # For specific difficulty, get questions of that difficulty
-            selected_questions = db.query(QuestionBank).filter(
-                QuestionBank.kb_id == request.kb_id,
-                QuestionBank.difficulty == request.difficulty
-            ).order_by(func.random()).limit(request.num_questions).all()
+            counts = {request.difficulty: request.num_questions}
+        
+        selected_questions = await _sample_question_bank(db, request.kb_id, counts)
         
         if not selected_questions:
             raise HTTPException(
@@ -174,22 +255,22 @@ def generate_quiz(
         
         # Create quiz record
         quiz = Quiz(
-            kb_id=kb.id,
-            user_id=current_user.id,
+            kb_id=request.kb_id,
+            user_id=current_user_id,
             difficulty=request.difficulty,
             num_questions=len(selected_questions)
         )
         
+        # Flush only to assign quiz.id (created_at comes back via RETURNING);
+        # the quiz and its questions are committed together below
         db.add(quiz)
-        db.commit()
-        db.refresh(quiz)
-        
-        # Create question records
-        answer_key = []
-        question_responses = []
-        
-        for order, bank_question in enumerate(selected_questions, 1):
-            question = QuizQuestion(
+        await db.flush()
+
+        # Create question records in one INSERT; ids are generated up front so
+        # the response can reference them without reloading the rows
+        rows = [
+            dict(
+                id=uuid7(),
                 quiz_id=quiz.id,
                 chunk_id=None,  # Not tracking chunk_id for bank questions
                 question_text=bank_question.question_text,
@@ -198,35 +279,40 @@ def generate_quiz(
                 difficulty=bank_question.difficulty,
                 question_order=order
             )
-            
-            db.add(question)
-            db.commit()
-            db.refresh(question)
-            
-            # Build response objects
-            question_responses.append(QuestionResponse(
-                id=str(question.id),
-                question_text=question.question_text,
-                options=question.options,
-                difficulty=question.difficulty,
-                question_order=question.question_order
-            ))
-            
-            answer_key.append(AnswerKeyResponse(
-                question_id=str(question.id),
-                question_text=question.question_text,
-                correct_answer=question.correct_answer,
-                options=question.options
-            ))
+            for order, bank_question in enumerate(selected_questions, 1)
+        ]
+        await db.run_sync(QuizQuestion.bulk_create, rows)
+        await db.commit()
+        
+        # Build response objects
+        question_responses = [
+            QuestionResponse(
+                id=row["id"],
+                question_text=row["question_text"],
+                options=row["options"],
+                difficulty=row["difficulty"],
+                question_order=row["question_order"]
+            )
+            for row in rows
+        ]
+        answer_key = [
+            AnswerKeyResponse(
+                question_id=row["id"],
+                question_text=row["question_text"],
+                correct_answer=row["correct_answer"],
+                options=row["options"]
+            )
+            for row in rows
+        ]
         
         # Build final response
         quiz_response = QuizResponse(
-            id=str(quiz.id),
-            kb_id=str(quiz.kb_id),
-            user_id=str(quiz.user_id),
+            id=quiz.id,
+            kb_id=quiz.kb_id,
+            user_id=quiz.user_id,
             difficulty=quiz.difficulty,
             num_questions=quiz.num_questions,
-            created_at=quiz.created_at.isoformat(),
+            created_at=quiz.created_at,
             questions=question_responses
         )
         
@@ -251,8 +337,8 @@ def generate_quiz(
 
 @router.get("/{quiz_id}", response_model=QuizResponse)
 def get_quiz(
-    quiz_id: str,
-    current_user: User = Depends(get_current_user),
+    quiz_id: UUID,
+    current_user_id: UUID = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
     """
@@ -261,10 +347,15 @@ def get_quiz(
     Protected endpoint - requires JWT authentication.
     Only returns quizzes owned by the current user.
     """
-    quiz = db.query(Quiz).filter(
-        Quiz.id == quiz_id,
-        Quiz.user_id == current_user.id
-    ).first()
+    # Quiz and its ordered questions in one round-trip
+    quiz = db.execute(
+        select(Quiz)
+        .options(joinedload(Quiz.questions))
+        .where(
+            Quiz.id == quiz_id,
+            Quiz.user_id == current_user_id
+        )
+    ).unique().scalar_one_or_none()
     
     if not quiz:
         raise HTTPException(
@@ -272,36 +363,14 @@ def get_quiz(
             detail="Quiz not found"
         )
     
-    questions = db.query(QuizQuestion).filter(
-        QuizQuestion.quiz_id == quiz.id
-    ).order_by(QuizQuestion.question_order).all()
-    
-    question_responses = [
-        QuestionResponse(
-            id=str(q.id),
-            question_text=q.question_text,
-            options=q.options,
-            difficulty=q.difficulty,
-            question_order=q.question_order
-        )
-        for q in questions
-    ]
-    
-    return QuizResponse(
-        id=str(quiz.id),
-        kb_id=str(quiz.kb_id),
-        user_id=str(quiz.user_id),
-        difficulty=quiz.difficulty,
-        num_questions=quiz.num_questions,
-        created_at=quiz.created_at.isoformat(),
-        questions=question_responses
-    )
+    # The quiz and its loaded questions are read in one pydantic-core call
+    return QuizResponse.model_validate(quiz)
 
 
 @router.get("/{quiz_id}/answers", response_model=List[AnswerKeyResponse])
 def get_quiz_answers(
-    quiz_id: str,
-    current_user: User = Depends(get_current_user),
+    quiz_id: UUID,
+    current_user_id: UUID = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
     """
@@ -310,10 +379,23 @@ def get_quiz_answers(
     Protected endpoint - requires JWT authentication.
     Only returns answer keys for quizzes owned by the current user.
     """
-    quiz = db.query(Quiz).filter(
-        Quiz.id == quiz_id,
-        Quiz.user_id == current_user.id
-    ).first()
+    # One round-trip, fetching only the columns the answer key needs
+    quiz = db.execute(
+        select(Quiz)
+        .options(
+            load_only(Quiz.id),
+            joinedload(Quiz.questions).load_only(
+                QuizQuestion.id,
+                QuizQuestion.question_text,
+                QuizQuestion.correct_answer,
+                QuizQuestion.options
+            )
+        )
+        .where(
+            Quiz.id == quiz_id,
+            Quiz.user_id == current_user_id
+        )
+    ).unique().scalar_one_or_none()
     
     if not quiz:
         raise HTTPException(
@@ -321,13 +403,11 @@ def get_quiz_answers(
             detail="Quiz not found"
         )
     
-    questions = db.query(QuizQuestion).filter(
-        QuizQuestion.quiz_id == quiz.id
-    ).order_by(QuizQuestion.question_order).all()
+    questions = quiz.questions
     
     return [
         AnswerKeyResponse(
-            question_id=str(q.id),
+            question_id=q.id,
             question_text=q.question_text,
             correct_answer=q.correct_answer,
             options=q.options
@@ -336,29 +416,43 @@ def get_quiz_answers(
     ]
 
 @router.post("/{quiz_id}/submit", response_model=SubmitQuizResponse)
-def submit_quiz_answers(
-        quiz_id: str,
+async def submit_quiz_answers(
+        quiz_id: UUID,
         request: SubmitQuizRequest,
-        current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        current_user_id: UUID = Depends(get_current_user_id),
+        db: AsyncSession = Depends(get_async_db)
     ):
         """
         Submit answers for a quiz (MCQ only for POC), grade them (correct/wrong),
         persist `QuizAnswer` rows, create a `QuizSummary`, and return results.
         """
-        # Verify quiz exists
-        quiz = db.query(Quiz).filter(Quiz.id == quiz_id).first()
-        if not quiz:
+        # Existence and ownership are checked on every submit (a primary-key
+        # lookup), so a quiz deleted with its KB is a 404 even when its
+        # answers are still cached
+        owned_quiz_id = (await db.execute(
+            select(Quiz.id).where(
+                Quiz.id == quiz_id,
+                Quiz.user_id == current_user_id
+            )
+        )).scalar_one_or_none()
+        if owned_quiz_id is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Quiz not found")
 
-        # Load questions for the quiz
-        questions = db.query(QuizQuestion).filter(QuizQuestion.quiz_id == quiz.id).all()
-        question_map = {str(q.id): q for q in questions}
-
-        if not questions:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Quiz has no questions")
+        # Answers are normalized once per quiz and cached, so repeat
+        # submissions skip both the question query and the normalization
+        question_map = _cached_for_user(_grading_cache, quiz_id, current_user_id)
+        if question_map is None:
+            # Load the columns grading needs, as plain rows
+            questions = (await db.execute(
+                select(QuizQuestion.id, QuizQuestion.correct_answer, QuizQuestion.options)
+                .where(QuizQuestion.quiz_id == quiz_id)
+            )).all()
+            
+            question_map = {str(q.id): _grading_key(q) for q in questions}
+            _cache_quiz(_grading_cache, quiz_id, current_user_id, question_map)
 
         results = []
+        answer_rows = []
         correct_count = 0
 
         # Persist answers
@@ -369,50 +463,41 @@ def submit_quiz_answers(
 
             # MCQ grading - handle stored answer as letter (A/B/C/...) or full text.
             correct = False
-            if q.correct_answer is not None:
-                stored = q.correct_answer.strip()
-
+            if q.answer_lower is not None:
                 # If question has options and stored answer is a single letter (A/B/C...)
-                if q.options and len(stored) == 1 and stored.isalpha():
+                if q.letter is not None:
                     # Try to map user's submitted value to a letter.
                     ua = ans.user_answer.strip()
-                    user_letter = None
 
-                    # If user submitted a single letter, use it directly
+                    # If user submitted a single letter, use it directly;
+                    # otherwise find which option text matches the answer
                     if len(ua) == 1 and ua.isalpha():
                         user_letter = ua.upper()
                     else:
-                        # Otherwise try to find which option text matches the submitted answer
-                        for idx, opt in enumerate(q.options):
-                            if opt and opt.strip().lower() == ua.lower():
-                                user_letter = chr(65 + idx)
-                                break
+                        user_letter = q.option_letters.get(ua.lower())
 
                     if user_letter:
-                        correct = user_letter.upper() == stored.upper()
+                        correct = user_letter == q.letter
                     else:
                         # Fallback to text comparison
-                        correct = ua.lower() == stored.lower()
+                        correct = ua.lower() == q.answer_lower
                 else:
                     # No options or stored answer is full text — compare normalized text
-                    user_norm = ans.user_answer.strip().lower()
-                    correct_norm = stored.lower()
-                    correct = user_norm == correct_norm
+                    correct = ans.user_answer.strip().lower() == q.answer_lower
 
             score = 1.0 if correct else 0.0
             result_text = "CORRECT" if correct else "WRONG"
 
-            qa = QuizAnswer(
+            answer_rows.append(dict(
                 question_id=q.id,
                 user_answer=ans.user_answer,
-                score=score,
+                score_hundredths=round(score * 100),
                 result=result_text,
                 feedback=None
-            )
-            db.add(qa)
+            ))
 
             results.append(QuestionResult(
-                question_id=str(q.id),
+                question_id=q.id,
                 correct_answer=q.correct_answer,
                 user_answer=ans.user_answer,
                 is_correct=correct,
@@ -422,14 +507,15 @@ def submit_quiz_answers(
             if correct:
                 correct_count += 1
 
-        db.commit()
+        # Answers go out in one INSERT; they and the summary share one commit
+        await db.run_sync(QuizAnswer.bulk_create, answer_rows)
 
-        total_questions = len(questions)
+        total_questions = len(question_map)
         accuracy = round((correct_count / total_questions) * 100, 2) if total_questions > 0 else 0.0
 
         # Create a quiz summary record
         summary = QuizSummary(
-            quiz_id=quiz.id,
+            quiz_id=quiz_id,
             total_questions=total_questions,
             correct_answers=correct_count,
             accuracy=accuracy,
@@ -438,10 +524,10 @@ def submit_quiz_answers(
             system_verdict="COMPLETED"
         )
         db.add(summary)
-        db.commit()
+        await db.commit()
 
         return SubmitQuizResponse(
-            quiz_id=str(quiz.id),
+            quiz_id=quiz_id,
             total_questions=total_questions,
             correct_answers=correct_count,
             accuracy=float(accuracy),
@@ -1,17 +1,14 @@
 """Teach Mode routes."""
-from typing import Optional, Any, Dict
-from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel
-from sqlalchemy.orm import Session
-
-from app.db.sessions import get_db
 from typing import Optional, Any, Dict, List
+from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.sessions import get_db
-from app.core.security import get_current_user
+from app.db.sessions import get_async_db
+from app.core.security import get_current_user_id
 from app.models import TeachingModule, TeachingConcept, TeachingSession
 from app.services.teach_engine import TeachingEngine
 
@@ -20,9 +17,19 @@ router = APIRouter(prefix="", tags=["Teach"])
 
 SESSION_NOT_FOUND = "Session not found"
 
+# Defaults InteractionResponse used to fill in; the engine omits them
+INTERACTION_DEFAULTS: Dict[str, Any] = {
+    "content": None,
+    "citations": [],
+    "options": [],
+    "is_checkpoint": False,
+    "progress": None,
+    "next": None,
+}
+
 
 class ModuleItem(BaseModel):
-    id: str
+    id: UUID
     title: str
     description: Optional[str]
     sequence_order: int
@@ -42,7 +49,7 @@ class StartSessionRequest(BaseModel):
 
 
 class StartSessionResponse(BaseModel):
-    session_id: str
+    session_id: UUID
     current_state: Dict[str, Any]
 
 
@@ -78,7 +85,7 @@ class InteractRequest(BaseModel):
 
 
 class SessionStatusResponse(BaseModel):
-    session_id: str
+    session_id: UUID
     current_state: Dict[str, Any]
     progress: float
 
@@ -93,71 +100,77 @@ class NavigateResponse(BaseModel):
     session_state: Dict[str, Any]
 
 
-@router.get("/kb/{kb_id}/teach/modules", response_model=ModuleListResponse)
-def list_modules(kb_id: str, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    modules = db.query(TeachingModule).filter(TeachingModule.kb_id == kb_id).order_by(TeachingModule.sequence_order).all()
-    modules_data = []
-    for m in modules:
-        modules_data.append({
-            "id": str(m.id),
-            "title": m.title,
-            "description": m.description,
-            "sequence_order": m.sequence_order,
-            "difficulty_level": m.difficulty_level,
-        })
-    return {"modules": modules_data}
-
-
-@router.post("/teach/{kb_id}/start", response_model=StartSessionResponse)
-def start_teach_session(kb_id: str, body: StartSessionRequest, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    engine = TeachingEngine(db)
-    session = engine.start_session(kb_id=kb_id, user_id=current_user.id, module_id=body.module_id, resume=body.resume)
-    return StartSessionResponse(session_id=str(session.id), current_state=session.session_state or {})
-
-
-@router.post("/teach/session/{session_id}/interact", response_model=InteractionResponse)
-def interact(session_id: str, body: InteractRequest, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    # verify ownership
-    session = db.query(TeachingSession).filter(TeachingSession.id == session_id, TeachingSession.user_id == current_user.id).first()
+async def get_owned_session(session_id: UUID, db: AsyncSession = Depends(get_async_db), current_user_id: UUID = Depends(get_current_user_id)) -> TeachingSession:
+    """Load the teaching session from the path, 404 unless it belongs to the current user."""
+    session = (await db.execute(select(TeachingSession).where(TeachingSession.id == session_id, TeachingSession.user_id == current_user_id))).scalar_one_or_none()
     if not session:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=SESSION_NOT_FOUND)
+    return session
 
-    engine = TeachingEngine(db)
-    resp = engine.process_interaction(session_id=session_id, payload=body.dict())
-    # coerce resp dict into InteractionResponse (Pydantic will validate)
-    return InteractionResponse(**resp)
 
+def get_teaching_engine(db: AsyncSession = Depends(get_async_db)) -> TeachingEngine:
+    """Teaching engine bound to the request's DB session."""
+    return TeachingEngine(db)
 
-@router.get("/teach/session/{session_id}/status", response_model=SessionStatusResponse)
-def session_status(session_id: str, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    session = db.query(TeachingSession).filter(TeachingSession.id == session_id, TeachingSession.user_id == current_user.id).first()
-    if not session:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=SESSION_NOT_FOUND)
-    return SessionStatusResponse(session_id=str(session.id), current_state=session.session_state or {}, progress=float(session.progress_percentage or 0))
 
+# Routes return ORJSONResponse directly so FastAPI skips response_model
+# validation and jsonable_encoder; the models are kept for the OpenAPI docs.
+# Ids are str()-ed: asyncpg returns its own UUID type, which orjson rejects.
+@router.get("/kb/{kb_id}/teach/modules", responses={200: {"model": ModuleListResponse}})
+async def list_modules(kb_id: UUID, db: AsyncSession = Depends(get_async_db), current_user_id: UUID = Depends(get_current_user_id)):
+    # Plain column rows: no ORM instances to build for a read-only listing
+    rows = (await db.execute(
+        select(
+            TeachingModule.id,
+            TeachingModule.title,
+            TeachingModule.description,
+            TeachingModule.sequence_order,
+            TeachingModule.difficulty_level,
+        )
+        .where(TeachingModule.kb_id == kb_id)
+        .order_by(TeachingModule.sequence_order)
+    )).mappings().all()
+    return ORJSONResponse({"modules": [{**r, "id": str(r["id"])} for r in rows]})
 
-@router.post("/teach/session/{session_id}/navigate", response_model=NavigateResponse)
-def navigate(session_id: str, body: NavigateRequest, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    # Simple navigation handler: maps actions to engine interactions
-    session = db.query(TeachingSession).filter(TeachingSession.id == session_id, TeachingSession.user_id == current_user.id).first()
-    if not session:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=SESSION_NOT_FOUND)
 
-    engine = TeachingEngine(db)
+@router.post("/teach/{kb_id}/start", responses={200: {"model": StartSessionResponse}})
+async def start_teach_session(kb_id: UUID, body: StartSessionRequest, engine: TeachingEngine = Depends(get_teaching_engine), current_user_id: UUID = Depends(get_current_user_id)):
+    session = await engine.start_session(kb_id=kb_id, user_id=current_user_id, module_id=body.module_id, resume=body.resume)
+    return ORJSONResponse({"session_id": str(session.id), "current_state": session.session_state or {}})
+
+
+@router.post("/teach/session/{session_id}/interact", responses={200: {"model": InteractionResponse}})
+async def interact(body: InteractRequest, session: TeachingSession = Depends(get_owned_session), engine: TeachingEngine = Depends(get_teaching_engine)):
+    resp = await engine.process_interaction(session_id=session.id, payload=body.model_dump(exclude_none=True), session=session)
+    return ORJSONResponse({**INTERACTION_DEFAULTS, **resp})
+
+
+@router.get("/teach/session/{session_id}/status", responses={200: {"model": SessionStatusResponse}})
+async def session_status(session: TeachingSession = Depends(get_owned_session)):
+    return ORJSONResponse({
+        "session_id": str(session.id),
+        "current_state": session.session_state or {},
+        "progress": float(session.progress_percentage or 0),
+    })
+
+
+@router.post("/teach/session/{session_id}/navigate", responses={200: {"model": NavigateResponse}})
+async def navigate(body: NavigateRequest, session: TeachingSession = Depends(get_owned_session), engine: TeachingEngine = Depends(get_teaching_engine), db: AsyncSession = Depends(get_async_db)):
+    # Simple navigation handler: maps actions to engine interactions
     action = body.action
     if action == "skip":
-        engine.process_interaction(session_id=session_id, payload={"choice": "continue"})
-        return NavigateResponse(status="ok", session_state=session.session_state or {})
+        await engine.process_interaction(session_id=session.id, payload={"choice": "continue"}, session=session)
+        return ORJSONResponse({"status": "ok", "session_state": session.session_state or {}})
     if action == "back":
         # naive: re-show current content
-        engine.process_interaction(session_id=session_id, payload={})
-        return NavigateResponse(status="ok", session_state=session.session_state or {})
+        await engine.process_interaction(session_id=session.id, payload={}, session=session)
+        return ORJSONResponse({"status": "ok", "session_state": session.session_state or {}})
     if action == "jump_to_module" and body.target:
         # set current module and concept to target module
         session.current_module_id = body.target
-        first = db.query(TeachingConcept).filter(TeachingConcept.module_id == body.target).order_by(TeachingConcept.created_at).first()
+        first = (await db.scalars(select(TeachingConcept).where(TeachingConcept.module_id == body.target).order_by(TeachingConcept.sequence_order).limit(1))).first()
         session.current_concept_id = first.id if first else None
-        db.commit()
-        return NavigateResponse(status="ok", session_state=session.session_state or {})
+        await db.commit()
+        return ORJSONResponse({"status": "ok", "session_state": session.session_state or {}})
 
     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid navigation action")
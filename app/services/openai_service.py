@@ -1,19 +1,38 @@
 """OpenAI LLM service for quiz generation and teaching."""
-import json
-from typing import List, Dict, Optional
-from openai import OpenAI
+import asyncio
+import logging
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple
+import orjson
+from openai import AsyncOpenAI
 from app.core.config import settings
 
+logger = logging.getLogger("app.services.openai_service")
+
+# Question bank generation fans out over chunk batches: smaller prompts run
+# concurrently instead of one large prompt. Large KBs are sampled evenly down
+# to QUESTION_BANK_MAX_CHUNKS so the number of concurrent calls stays bounded.
+QUESTION_BANK_BATCH_SIZE = 20
+QUESTION_BANK_MAX_CHUNKS = 200
+QUESTION_BANK_COUNTS = {"easy": 34, "medium": 33, "hard": 33}
+
+DIFFICULTY_GUIDELINES = {
+    "EASY": "Focus on recall and identification questions.",
+    "MEDIUM": "Focus on explanation and comparison questions.",
+    "HARD": "Focus on application and reasoning questions.",
+    "MIXED": "Create a mix of easy, medium, and hard questions"
+}
+
 
 class OpenAIService:
     """Service for interacting with OpenAI API."""
     
     def __init__(self):
         """Initialize OpenAI client with API key from settings."""
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.async_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
         self.model = getattr(settings, 'OPENAI_MODEL', 'gpt-4o-mini')
     
-    def generate_quiz_questions(
+    async def generate_quiz_questions(
         self,
         chunks_content: List[Dict[str, str]],
         num_questions: int = 5,
@@ -43,29 +62,28 @@ class OpenAIService:
         context = self._prepare_context(chunks_content)
         
         # Build the prompt
-        system_prompt = self._build_system_prompt(difficulty)
-        user_prompt = self._build_user_prompt(
+        messages = self._build_messages(
+            system_prompt=self._build_system_prompt(),
             context=context,
-            num_questions=num_questions,
-            difficulty=difficulty,
-            custom_prompt=custom_prompt
+            instructions=self._build_user_prompt(
+                num_questions=num_questions,
+                difficulty=difficulty,
+                custom_prompt=custom_prompt
+            )
         )
         
         # Call OpenAI API
         try:
-            response = self.client.chat.completions.create(
+            response = await self.async_client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
+                messages=messages,
                 temperature=0.7,
                 response_format={"type": "json_object"}
             )
             
             # Parse response
             content = response.choices[0].message.content
-            result = json.loads(content)
+            result = orjson.loads(content)
             
             return result.get("questions", [])
             
@@ -74,35 +92,32 @@ class OpenAIService:
     
     def _prepare_context(self, chunks_content: List[Dict[str, str]]) -> str:
         """Prepare context string from chunks."""
-        context_parts = []
-        
-        for idx, chunk in enumerate(chunks_content):
-            text = chunk.get('text', '')
-            topic = chunk.get('topic', 'Unknown')
-            source = chunk.get('source_file', 'Unknown')
-            
-            context_parts.append(
-                f"[Chunk {idx}] (Source: {source}, Topic: {topic})\n{text}\n"
-            )
+        return "\n---\n".join(
+            f"[Chunk {idx}] (Source: {chunk.get('source_file', 'Unknown')}, "
+            f"Topic: {chunk.get('topic', 'Unknown')})\n{chunk.get('text', '')}\n"
+            for idx, chunk in enumerate(chunks_content)
+        )
+    
+    def _build_messages(self, system_prompt: str, context: str, instructions: str) -> List[Dict[str, str]]:
+        """
+        Chat messages with the per-request instructions last.
         
-        return "\n---\n".join(context_parts)
+        OpenAI caches prompts by their longest matching prefix, so the fixed
+        system prompt and the chunk content come first and repeat verbatim
+        across requests for the same chunks.
+        """
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": f"CONTENT:\n{context}"},
+            {"role": "user", "content": instructions}
+        ]
     
-    def _build_system_prompt(self, difficulty: str) -> str:
+    def _build_system_prompt(self) -> str:
         """Build the system prompt for quiz generation."""
-        difficulty_guidelines = {
-            "EASY": "Focus on recall and identification questions.",
-            "MEDIUM": "Focus on explanation and comparison questions.",
-            "HARD": "Focus on application and reasoning questions.",
-            "MIXED": "Create a mix of easy, medium, and hard questions"
-        }
-        
-        guideline = difficulty_guidelines.get(difficulty, difficulty_guidelines["MEDIUM"])
-        
-        return f"""You are an expert quiz creator for educational content. 
+        return """You are an expert quiz creator for educational content. 
 Your task is to generate high-quality quiz questions based on provided document chunks.
 
 Guidelines:
-- {guideline}
 - Questions must be clear, unambiguous, and directly answerable from the content
 - Use simple multiple choice for all difficulty types, provide 4 options (labeled A, B, C, D) with exactly one correct answer
 - Each question should reference specific content from the chunks
@@ -110,30 +125,29 @@ Guidelines:
 - Return ONLY valid JSON in the specified format
 
 Output format:
-{{
+{
   "questions": [
-    {{
+    {
       "question_text": "The question text",
       "correct_answer": "The correct answer (for MCQ: A/B/C/D)",
       "options": ["Option A text", "Option B text", "Option C text", "Option D text"],
       "difficulty": "EASY|MEDIUM|HARD",
       "chunk_index": 0
-    }}
+    }
   ]
-}}"""
+}"""
     
     def _build_user_prompt(
         self,
-        context: str,
         num_questions: int,
         difficulty: str,
         custom_prompt: Optional[str]
     ) -> str:
-        """Build the user prompt with context and requirements."""
-        base_prompt = f"""Based on the following content, generate {num_questions} quiz questions with difficulty level: {difficulty}
-
-CONTENT:
-{context}
+        """Build the user prompt with the requirements; the content is sent before it."""
+        guideline = DIFFICULTY_GUIDELINES.get(difficulty, DIFFICULTY_GUIDELINES["MEDIUM"])
+        
+        base_prompt = f"""Based on the content above, generate {num_questions} quiz questions with difficulty level: {difficulty}
+{guideline}
 
 REQUIREMENTS:
 - Generate exactly {num_questions} questions
@@ -153,7 +167,7 @@ REQUIREMENTS:
         
         return base_prompt
     
-    def generate_question_bank(
+    async def generate_question_bank(
         self,
         chunks_content: List[Dict[str, str]]
     ) -> Dict[str, List[Dict]]:
@@ -161,6 +175,11 @@ REQUIREMENTS:
         Generate a question bank with 100 questions (34 Easy, 33 Medium, 33 Hard)
         from knowledge base chunks for later quiz generation.
         
+        Chunks are split into batches of QUESTION_BANK_BATCH_SIZE and each batch
+        is asked for its share of the questions; the batches run concurrently
+        and their questions are merged. A batch that fails is logged and
+        skipped.
+        
         Args:
             chunks_content: List of chunk dictionaries with 'text', 'topic', 'source_file'
             
@@ -172,8 +191,69 @@ REQUIREMENTS:
                 "hard": [...]      # 33 hard questions
             }
         """
+        calls = [
+            self._generate_question_bank_batch(batch, counts)
+            for batch, counts in self.plan_question_bank(chunks_content)
+        ]
+        
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        
+        merged: Dict[str, List[Dict]] = {level: [] for level in QUESTION_BANK_COUNTS}
+        errors = []
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning("Question bank batch failed: %s", result)
+                errors.append(result)
+                continue
+            for level in merged:
+                merged[level].extend(result.get(level, []))
+        
+        if errors and len(errors) == len(results):
+            raise errors[0]
+        
+        return merged
+    
+    def plan_question_bank(
+        self,
+        chunks_content: List[Dict[str, str]]
+    ) -> List[Tuple[List[Dict[str, str]], Dict[str, int]]]:
+        """
+        Split chunks into question bank batches and each batch's question counts.
+        
+        Large KBs are first sampled evenly down to QUESTION_BANK_MAX_CHUNKS;
+        each difficulty's total is spread across the batches.
+        
+        Returns:
+            (chunk batch, {"easy": n, "medium": n, "hard": n}) per request
+        """
+        if len(chunks_content) > QUESTION_BANK_MAX_CHUNKS:
+            step = len(chunks_content) / QUESTION_BANK_MAX_CHUNKS
+            chunks_content = [chunks_content[int(i * step)] for i in range(QUESTION_BANK_MAX_CHUNKS)]
+        
+        batches = [
+            chunks_content[i:i + QUESTION_BANK_BATCH_SIZE]
+            for i in range(0, len(chunks_content), QUESTION_BANK_BATCH_SIZE)
+        ]
+        
+        plan = []
+        for idx, batch in enumerate(batches):
+            counts = {
+                level: total // len(batches) + (1 if idx < total % len(batches) else 0)
+                for level, total in QUESTION_BANK_COUNTS.items()
+            }
+            if any(counts.values()):
+                plan.append((batch, counts))
+        return plan
+    
+    def question_bank_request(
+        self,
+        chunks_content: List[Dict[str, str]],
+        counts: Dict[str, int]
+    ) -> Dict:
+        """Chat completion parameters asking one chunk batch for `counts` questions."""
         # Prepare context from chunks
         context = self._prepare_context(chunks_content)
+        easy, medium, hard = counts["easy"], counts["medium"], counts["hard"]
         
         # Build the prompt for generating question bank
         system_prompt = """You are an expert quiz creator for educational content.
@@ -200,18 +280,15 @@ Output format:
   "hard": [...]
 }"""
         
-        user_prompt = f"""Based on the following content, generate a question bank with:
-- 34 EASY questions (focus on recall and identification)
-- 33 MEDIUM questions (focus on explanation and comparison)
-- 33 HARD questions (focus on application and reasoning)
-
-Total: 100 questions covering different topics and aspects of the content.
+        user_prompt = f"""Based on the content above, generate a question bank with:
+- {easy} EASY questions (focus on recall and identification)
+- {medium} MEDIUM questions (focus on explanation and comparison)
+- {hard} HARD questions (focus on application and reasoning)
 
-CONTENT:
-{context}
+Total: {easy + medium + hard} questions covering different topics and aspects of the content.
 
 REQUIREMENTS:
-- Generate exactly 34 EASY, 33 MEDIUM, and 33 HARD questions
+- Generate exactly {easy} EASY, {medium} MEDIUM, and {hard} HARD questions
 - Each question must include:
   * question_text (clear and specific)
   * correct_answer (A/B/C/D for MCQ)
@@ -221,23 +298,36 @@ REQUIREMENTS:
 
 Return your response as valid JSON following the specified format."""
         
+        return dict(
+            model=self.model,
+            messages=self._build_messages(system_prompt, context, user_prompt),
+            temperature=0.7,
+            response_format={"type": "json_object"}
+        )
+    
+    async def _generate_question_bank_batch(
+        self,
+        chunks_content: List[Dict[str, str]],
+        counts: Dict[str, int]
+    ) -> Dict[str, List[Dict]]:
+        """Generate `counts` easy/medium/hard questions from one chunk batch."""
         # Call OpenAI API
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.7,
-                response_format={"type": "json_object"}
+            response = await self.async_client.chat.completions.create(
+                **self.question_bank_request(chunks_content, counts)
             )
             
             # Parse response
             content = response.choices[0].message.content
-            result = json.loads(content)
+            result = orjson.loads(content)
             
             return result
             
         except Exception as e:
             raise ValueError(f"Error generating question bank from OpenAI: {str(e)}")
+
+
+@lru_cache(maxsize=1)
+def get_openai_service() -> OpenAIService:
+    """Shared OpenAIService, so HTTP connections to the API are kept alive and reused."""
+    return OpenAIService()
@@ -0,0 +1,210 @@
+"""Offline question bank generation through the OpenAI Batch API.
+
+Uploads normally generate their question bank right away in a background
+task. Knowledge bases whose bank is missing or failed can instead be
+(re)generated in bulk through the Batch API, which is cheaper and has
+separate rate limits but may take up to 24 hours:
+
+    python -m app.services.question_bank_batch submit
+    python -m app.services.question_bank_batch collect <batch_id>
+
+`submit` prints the batch id; `collect` stores the questions once the batch
+has finished and can simply be re-run until it has. KBs the batch produced
+no questions for (including a failed, expired or cancelled batch) go back to
+FAILED, so the next `submit` picks them up again.
+"""
+import io
+import logging
+import sys
+from collections import defaultdict
+from typing import Dict, List
+from uuid import UUID
+
+import orjson
+from openai import OpenAI
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.sessions import SessionLocal
+from app.models.chunk import Chunk
+from app.models.knowledge_base import KnowledgeBase
+from app.models.question_bank import QuestionBank
+from app.services.openai_service import get_openai_service
+
+logger = logging.getLogger("app.services.question_bank_batch")
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+# Batch statuses after which no more output will be produced
+BATCH_FINAL_STATUSES = {"completed", "expired", "cancelled", "failed"}
+
+
+def _kbs_needing_bank(db: Session) -> List[UUID]:
+    """Processed KBs whose question bank was never generated or failed."""
+    return list(db.scalars(
+        select(KnowledgeBase.id).where(
+            KnowledgeBase.status == "COMPLETED",
+            or_(
+                KnowledgeBase.question_bank_status.is_(None),
+                KnowledgeBase.question_bank_status == "FAILED"
+            )
+        )
+    ))
+
+
+def _chunks_content(db: Session, kb_id: UUID) -> list:
+    return db.execute(
+        select(
+            Chunk.text,
+            func.coalesce(Chunk.topic, "General").label("topic"),
+            func.coalesce(Chunk.source_file, "Unknown").label("source_file")
+        )
+        .where(Chunk.kb_id == kb_id)
+    ).mappings().all()
+
+
+def _kb_id(custom_id: str) -> UUID:
+    return UUID(custom_id.split(":", 1)[0])
+
+
+def submit() -> str:
+    """
+    Submit one Batch API job covering every KB that needs a question bank.
+
+    The KBs are marked PENDING so they are not submitted twice.
+
+    Returns:
+        The batch id, or "" if there was nothing to submit
+    """
+    service = get_openai_service()
+    db = SessionLocal()
+    try:
+        lines = []
+        kb_ids = []
+        for kb_id in _kbs_needing_bank(db):
+            chunks = _chunks_content(db, kb_id)
+            if not chunks:
+                continue
+            kb_ids.append(kb_id)
+            for idx, (batch, counts) in enumerate(service.plan_question_bank(chunks)):
+                lines.append(orjson.dumps({
+                    "custom_id": f"{kb_id}:{idx}",
+                    "method": "POST",
+                    "url": BATCH_ENDPOINT,
+                    "body": service.question_bank_request(batch, counts)
+                }))
+
+        if not lines:
+            logger.info("No knowledge bases need a question bank")
+            return ""
+
+        client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        input_file = client.files.create(
+            file=("question_bank.jsonl", io.BytesIO(b"\n".join(lines))),
+            purpose="batch"
+        )
+        batch = client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h"
+        )
+
+        db.execute(
+            update(KnowledgeBase)
+            .where(KnowledgeBase.id.in_(kb_ids))
+            .values(question_bank_status="PENDING")
+        )
+        db.commit()
+        logger.info("Submitted batch %s: %d requests for %d KBs", batch.id, len(lines), len(kb_ids))
+        return batch.id
+    finally:
+        db.close()
+
+
+def collect(batch_id: str) -> bool:
+    """
+    Store the questions from a finished batch, replacing each KB's bank.
+
+    Expired or cancelled batches still store whatever completed. Every KB in
+    the batch that got no questions (all its requests failed, or the batch
+    failed) is marked FAILED instead of being left PENDING.
+
+    Returns:
+        True if the batch had finished and was collected, False otherwise
+    """
+    client = OpenAI(api_key=settings.OPENAI_API_KEY)
+    batch = client.batches.retrieve(batch_id)
+    if batch.status not in BATCH_FINAL_STATUSES:
+        logger.info("Batch %s is %s", batch_id, batch.status)
+        return False
+
+    # The KBs this batch was submitted for, read back from its input file
+    submitted = {
+        _kb_id(orjson.loads(line)["custom_id"])
+        for line in client.files.content(batch.input_file_id).text.splitlines()
+        if line
+    }
+
+    questions: Dict[UUID, Dict[str, List[Dict]]] = defaultdict(lambda: defaultdict(list))
+    output = client.files.content(batch.output_file_id).text if batch.output_file_id else ""
+    for line in output.splitlines():
+        record = orjson.loads(line)
+        response = record.get("response") or {}
+        try:
+            if response.get("status_code") != 200:
+                raise ValueError(record.get("error") or response.get("status_code"))
+            content = response["body"]["choices"][0]["message"]["content"]
+            for level, items in orjson.loads(content).items():
+                questions[_kb_id(record["custom_id"])][level].extend(items)
+        except Exception as e:
+            logger.warning("Question bank request %s failed: %s", record["custom_id"], e)
+
+    db = SessionLocal()
+    try:
+        for kb_id, levels in questions.items():
+            rows = [
+                dict(
+                    kb_id=kb_id,
+                    question_text=q_data['question_text'],
+                    correct_answer=q_data['correct_answer'],
+                    options=q_data.get('options'),
+                    difficulty=level.upper()  # EASY, MEDIUM, HARD
+                )
+                for level, items in levels.items()
+                for q_data in items
+            ]
+            db.execute(delete(QuestionBank).where(QuestionBank.kb_id == kb_id))
+            QuestionBank.bulk_create(db, rows)
+            db.execute(
+                update(KnowledgeBase)
+                .where(KnowledgeBase.id == kb_id)
+                .values(question_bank_status="COMPLETED")
+            )
+            db.commit()
+
+        failed = submitted - questions.keys()
+        if failed:
+            db.execute(
+                update(KnowledgeBase)
+                .where(KnowledgeBase.id.in_(failed))
+                .values(question_bank_status="FAILED")
+            )
+            db.commit()
+        logger.info(
+            "Collected %s batch %s: %d KBs stored, %d failed",
+            batch.status, batch_id, len(questions), len(failed)
+        )
+        return True
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if sys.argv[1:2] == ["submit"]:
+        print(submit())
+    elif sys.argv[1:2] == ["collect"] and len(sys.argv) == 3:
+        sys.exit(0 if collect(sys.argv[2]) else 1)
+    else:
+        sys.exit("usage: python -m app.services.question_bank_batch submit | collect <batch_id>")
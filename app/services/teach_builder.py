@@ -3,17 +3,20 @@
 Creates teaching modules and concepts from existing chunks during KB build.
 This is a lightweight, idempotent implementation suitable for POC use.
 """
-from typing import Optional, List, Dict
+from typing import Optional, Iterable, List, Dict
 import logging
 import uuid
 import re
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy import exists, select
 
 from app.models import Chunk, TeachingModule, TeachingConcept
 
 logger = logging.getLogger(__name__)
 
+_HEADING_RE = re.compile(r"^#{1,6}\s*(.+)$", re.MULTILINE)
+_SENTENCE_END_RE = re.compile(r"[\.\!\?]\s+")
+
 
 class SimpleLLMStub:
     """Fallback LLM-like stub for summary and question generation.
@@ -31,6 +34,12 @@ class SimpleLLMStub:
         opts = {"A": f"{concept_name} is important.", "B": f"{concept_name} is irrelevant.", "C": f"{concept_name} depends on context.", "correct": "A"}
         return {"question": q, "options": opts}
 
+    def generate_summaries_batch(self, texts: List[str], max_chars: int = 300) -> List[str]:
+        return [self.generate_summary(t, max_chars=max_chars) for t in texts]
+
+    def generate_questions_batch(self, concept_names: List[str]) -> List[Dict]:
+        return [self.generate_question(name) for name in concept_names]
+
 
 class TeachingModuleBuilder:
     """Build teaching modules and concepts for a given KB.
@@ -44,7 +53,21 @@ class TeachingModuleBuilder:
         self.db = db
         self.llm = llm_service or SimpleLLMStub()
 
-    def _group_chunks_by_section(self, chunks: List[Chunk]) -> Dict[str, List[Chunk]]:
+    def _summaries(self, texts: List[str], max_chars: int) -> List[str]:
+        # One call for all texts when the service supports batching (a real
+        # LLM then makes one round-trip instead of one per text)
+        batch = getattr(self.llm, "generate_summaries_batch", None)
+        if batch:
+            return batch(texts, max_chars=max_chars)
+        return [self.llm.generate_summary(t, max_chars=max_chars) for t in texts]
+
+    def _questions(self, concept_names: List[str]) -> List[Dict]:
+        batch = getattr(self.llm, "generate_questions_batch", None)
+        if batch:
+            return batch(concept_names)
+        return [self.llm.generate_question(name) for name in concept_names]
+
+    def _group_chunks_by_section(self, chunks: Iterable[Chunk]) -> Dict[str, List[Chunk]]:
         groups: Dict[str, List[Chunk]] = {}
         for c in chunks:
             key = c.section or c.topic or "_untitled"
@@ -54,8 +77,8 @@ class TeachingModuleBuilder:
     def _extract_heading(self, text: str) -> Optional[str]:
         if not text:
             return None
-        # Markdown heading
-        m = re.search(r"^#{1,6}\s*(.+)$", text, flags=re.MULTILINE)
+        # Markdown heading (skip the regex scan when there is no '#' at all)
+        m = _HEADING_RE.search(text) if "#" in text else None
         if m:
             return m.group(1).strip()
         # Lines that look like headings: short, titlecase, not a sentence
@@ -82,9 +105,9 @@ class TeachingModuleBuilder:
         txt = (chunk.text or "").strip()
         if not txt:
             return fallback
-        # Split into sentences
-        sents = re.split(r'[\.\!\?]\s+', txt)
-        first = sents[0] if sents else txt
+        # Only the first sentence is needed, so stop at the first sentence end
+        m = _SENTENCE_END_RE.search(txt)
+        first = txt[:m.start()] if m else txt
         words = first.split()
         if len(words) <= 6:
             return first.strip()[:120]
@@ -103,19 +126,33 @@ class TeachingModuleBuilder:
             self.db.commit()
 
         # If modules already exist and not forcing, skip build
-        exists = self.db.query(func.count(TeachingModule.id)).filter(TeachingModule.kb_id == kb_id).scalar()
-        if exists and not force:
+        has_modules = self.db.scalar(select(exists().where(TeachingModule.kb_id == kb_id)))
+        if has_modules and not force:
             logger.info("Teaching modules already exist for kb_id=%s; skipping build", kb_id)
             return
 
-        # Fetch chunks for KB ordered by created_at (document order)
-        chunks = self.db.query(Chunk).filter(Chunk.kb_id == kb_id).order_by(Chunk.created_at).all()
-        if not chunks:
+        # Load chunks for KB in document order, only the columns module and
+        # concept building read. Sections span documents and the summaries
+        # are generated in one batch, so every chunk is held until the end.
+        chunks = (
+            self.db.query(Chunk)
+            .options(load_only(Chunk.id, Chunk.text, Chunk.topic, Chunk.section, Chunk.keywords, Chunk.page_number))
+            .filter(Chunk.kb_id == kb_id)
+            .order_by(Chunk.document_id, Chunk.chunk_index)
+            .all()
+        )
+        groups = self._group_chunks_by_section(chunks)
+        if not groups:
             logger.warning("No chunks found for kb_id=%s; nothing to build", kb_id)
             return
 
-        groups = self._group_chunks_by_section(chunks)
-
+        # Module ids are assigned here so concepts can reference them; modules
+        # and concepts are then inserted in one batch each. Summaries and
+        # checkpoint questions are generated in one batch per kind.
+        module_rows = []
+        module_texts = []
+        concept_rows = []
+        concept_chunks = []
         sequence = 1
         for section, chks in sorted(groups.items()):
             # derive a friendly module title: prefer section if meaningful, else infer from first chunk
@@ -124,42 +161,50 @@ class TeachingModuleBuilder:
             else:
                 title = self._friendly_title(chks[0], fallback=f"Module {sequence}")
             # create module
-            module = TeachingModule(
+            module_id = uuid.uuid4()
+            module_rows.append(dict(
+                id=module_id,
                 kb_id=kb_id,
                 parent_module_id=None,
                 title=title,
-                description=self.llm.generate_summary("\n\n".join([c.text for c in chks])[:1000]),
                 sequence_order=sequence,
                 estimated_minutes=max(1, int(sum((len(c.text or "") for c in chks)) / 800)),
                 difficulty_level="beginner",
                 prerequisites=[],
                 learning_objectives=[],
-            )
-            self.db.add(module)
-            self.db.flush()  # populate module.id for FK references
+            ))
+            module_texts.append("\n\n".join([c.text for c in chks])[:1000])
 
             # Create simple concepts from each chunk (dedupe by small text hash)
-            for c in chks:
+            for concept_order, c in enumerate(chks, 1):
                 # pick a friendly concept name from chunk metadata or text
                 raw_concept = c.topic or (c.text or "").split("\n")[0][:120]
-                concept_name = self._friendly_title(c, fallback=raw_concept)
-                explanation = self.llm.generate_summary(c.text or "", max_chars=800)
-                # build a checkpoint question via LLM stub/service
-                q = self.llm.generate_question(concept_name)
-                concept = TeachingConcept(
-                    module_id=module.id,
-                    concept_name=concept_name,
-                    explanation=explanation,
+                concept_rows.append(dict(
+                    module_id=module_id,
+                    sequence_order=concept_order,
+                    concept_name=self._friendly_title(c, fallback=raw_concept),
                     chunk_ids=[c.id],
+                    citations=[{"chunk_id": str(c.id), "page": c.page_number, "highlight": (c.text or "")[:200]}],
                     keywords=c.keywords or [],
                     related_concept_ids=[],
-                    checkpoint_question=q.get("question"),
-                    checkpoint_options=q.get("options"),
-                )
-                self.db.add(concept)
+                ))
+                concept_chunks.append(c)
 
             sequence += 1
 
+        for row, description in zip(module_rows, self._summaries(module_texts, max_chars=300)):
+            row["description"] = description
+        explanations = self._summaries([c.text or "" for c in concept_chunks], max_chars=800)
+        # build checkpoint questions via LLM stub/service
+        questions = self._questions([row["concept_name"] for row in concept_rows])
+        for row, explanation, q in zip(concept_rows, explanations, questions):
+            row["explanation"] = explanation
+            row["checkpoint_question"] = q.get("question")
+            row["checkpoint_options"] = q.get("options")
+
+        TeachingModule.bulk_create(self.db, module_rows)
+        TeachingConcept.bulk_create(self.db, concept_rows)
+
         # commit all created modules/concepts
         self.db.commit()
         logger.info("Built %d teaching modules for kb_id=%s", sequence - 1, kb_id)
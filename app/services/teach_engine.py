@@ -5,9 +5,9 @@ This is a lightweight state machine suitable for POC and local testing.
 """
 from typing import Optional, Dict, Any
 import logging
-from datetime import datetime
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from datetime import datetime, timezone
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import exists, func, select
 
 from app.models import (
     TeachingModule,
@@ -30,12 +30,16 @@ class SimpleLLMFallback:
         return (prompt or "").strip()[:max_chars]
 
 
+# Stateless, so one instance serves every engine
+_default_llm = SimpleLLMFallback()
+
+
 class TeachingEngine:
-    def __init__(self, db: Session, llm_service: Optional[Any] = None):
+    def __init__(self, db: AsyncSession, llm_service: Optional[Any] = None):
         self.db = db
-        self.llm = llm_service or SimpleLLMFallback()
+        self.llm = llm_service or _default_llm
 
-    def start_session(self, kb_id, user_id, module_id: Optional[str] = None, resume: bool = True) -> TeachingSession:
+    async def start_session(self, kb_id, user_id, module_id: Optional[str] = None, resume: bool = True) -> TeachingSession:
         """Create or resume a teaching session for a user and KB.
 
         If `resume` is True and an active (non-completed) session exists, return it.
@@ -43,11 +47,11 @@ class TeachingEngine:
         """
         # Try to resume
         if resume:
-            existing = self.db.query(TeachingSession).filter(
+            existing = (await self.db.scalars(select(TeachingSession).where(
                 TeachingSession.user_id == user_id,
                 TeachingSession.kb_id == kb_id,
                 TeachingSession.completed_at == None
-            ).order_by(TeachingSession.last_active_at.desc()).first()
+            ).order_by(TeachingSession.last_active_at.desc()).limit(1))).first()
             if existing:
                 return existing
 
@@ -61,88 +65,144 @@ class TeachingEngine:
             session_state={},
         )
         self.db.add(session)
-        self.db.flush()
+        await self.db.flush()
 
         # Initialize current module and concept
         if module_id:
-            module = self.db.query(TeachingModule).filter(TeachingModule.id == module_id, TeachingModule.kb_id == kb_id).first()
+            module = (await self.db.execute(select(TeachingModule).where(TeachingModule.id == module_id, TeachingModule.kb_id == kb_id))).scalar_one_or_none()
         else:
-            module = self.db.query(TeachingModule).filter(TeachingModule.kb_id == kb_id).order_by(TeachingModule.sequence_order).first()
+            module = (await self.db.scalars(select(TeachingModule).where(TeachingModule.kb_id == kb_id).order_by(TeachingModule.sequence_order).limit(1))).first()
 
         if module:
             session.current_module_id = module.id
             # pick first concept in module
-            first_concept = self.db.query(TeachingConcept).filter(TeachingConcept.module_id == module.id).order_by(TeachingConcept.created_at).first()
+            first_concept = (await self.db.scalars(select(TeachingConcept).where(TeachingConcept.module_id == module.id).order_by(TeachingConcept.sequence_order).limit(1))).first()
             if first_concept:
                 session.current_concept_id = first_concept.id
 
-        session.started_at = datetime.utcnow()
-        session.last_active_at = datetime.utcnow()
-        self.db.commit()
-        self.db.refresh(session)
+        session.started_at = datetime.now(timezone.utc)
+        session.last_active_at = datetime.now(timezone.utc)
+        await self.db.commit()
+        await self.db.refresh(session)
         return session
 
-    def _get_module_concepts(self, module_id):
-        return self.db.query(TeachingConcept).filter(TeachingConcept.module_id == module_id).order_by(TeachingConcept.created_at).all()
+    async def _get_concept(self, concept_id) -> Optional[TeachingConcept]:
+        # Session.get answers from the identity map when the concept was
+        # already loaded this turn (nothing is committed mid-turn to expire it)
+        return await self.db.get(TeachingConcept, concept_id) if concept_id else None
+
+    async def _advance_targets(self, session: TeachingSession):
+        """Everything a step forward may need, in one round-trip.
+
+        Returns a row with:
+          first_id: first concept of the current module (None if it has none)
+          in_module: whether the current concept belongs to the current module
+          next_id: concept after the current one in the module
+          next_module_id: next module of the KB by sequence_order
+          next_module_first_id: first concept of that module
+        """
+        module_concepts = (
+            select(
+                TeachingConcept.id,
+                func.lead(TeachingConcept.id).over(order_by=TeachingConcept.sequence_order).label("next_id"),
+            )
+            .where(TeachingConcept.module_id == session.current_module_id)
+            .cte("module_concepts")
+        )
+        current_order = (
+            select(TeachingModule.sequence_order)
+            .where(TeachingModule.id == session.current_module_id)
+            .scalar_subquery()
+        )
+        next_module_id = (
+            select(TeachingModule.id)
+            .where(TeachingModule.kb_id == session.kb_id, TeachingModule.sequence_order > func.coalesce(current_order, 0))
+            .order_by(TeachingModule.sequence_order)
+            .limit(1)
+            .scalar_subquery()
+        )
+
+        def first_concept_of(module_id):
+            return (
+                select(TeachingConcept.id)
+                .where(TeachingConcept.module_id == module_id)
+                .order_by(TeachingConcept.sequence_order)
+                .limit(1)
+                .scalar_subquery()
+            )
+
+        return (await self.db.execute(select(
+            first_concept_of(session.current_module_id).label("first_id"),
+            exists().where(module_concepts.c.id == session.current_concept_id).label("in_module"),
+            select(module_concepts.c.next_id).where(module_concepts.c.id == session.current_concept_id).scalar_subquery().label("next_id"),
+            next_module_id.label("next_module_id"),
+            first_concept_of(next_module_id).label("next_module_first_id"),
+        ))).one()
 
-    def _advance_to_next_concept(self, session: TeachingSession) -> Optional[TeachingConcept]:
+    async def _advance_to_next_concept(self, session: TeachingSession) -> Optional[TeachingConcept]:
         if not session.current_module_id:
             return None
-        concepts = self._get_module_concepts(session.current_module_id)
-        if not concepts:
+        targets = await self._advance_targets(session)
+        if targets.first_id is None:
             return None
-        # find index of current
-        idx = next((i for i, c in enumerate(concepts) if c.id == session.current_concept_id), None)
-        if idx is None:
+        if not targets.in_module:
             # set to first
-            next_concept = concepts[0]
-        elif idx + 1 < len(concepts):
-            next_concept = concepts[idx + 1]
+            next_concept_id = targets.first_id
         else:
-            # module finished
-            next_concept = None
+            # None when the module is finished
+            next_concept_id = targets.next_id
 
-        if next_concept:
-            session.current_concept_id = next_concept.id
+        if next_concept_id:
+            session.current_concept_id = next_concept_id
         else:
             # mark module completed
+            # a new list, so the ARRAY column is seen as changed
             completed = session.completed_modules or []
             if session.current_module_id and session.current_module_id not in completed:
-                completed.append(session.current_module_id)
-                session.completed_modules = completed
-
-            # move to next module
-            next_module = self.db.query(TeachingModule).filter(TeachingModule.kb_id == session.kb_id, TeachingModule.sequence_order > (self.db.query(TeachingModule.sequence_order).filter(TeachingModule.id == session.current_module_id).scalar() or 0)).order_by(TeachingModule.sequence_order).first()
-            if next_module:
-                session.current_module_id = next_module.id
-                # set first concept of next module
-                first_concept = self.db.query(TeachingConcept).filter(TeachingConcept.module_id == next_module.id).order_by(TeachingConcept.created_at).first()
-                session.current_concept_id = first_concept.id if first_concept else None
-
-        session.last_active_at = datetime.utcnow()
-        self.db.commit()
-        return self.db.query(TeachingConcept).filter(TeachingConcept.id == session.current_concept_id).first() if session.current_concept_id else None
-
-    def process_interaction(self, session_id, payload: Dict[str, Any]) -> Dict[str, Any]:
+                session.completed_modules = [*completed, session.current_module_id]
+
+            # move to next module and its first concept
+            if targets.next_module_id:
+                session.current_module_id = targets.next_module_id
+                session.current_concept_id = targets.next_module_first_id
+
+        session.last_active_at = datetime.now(timezone.utc)
+        return await self._get_concept(session.current_concept_id)
+
+    async def process_interaction(self, session_id, payload: Dict[str, Any], session: Optional[TeachingSession] = None) -> Dict[str, Any]:
         """Process a user interaction payload and return a response dict.
 
         Payload can be:
           - {"choice": "A"}  # checkpoint option selection or control strings ('continue','checkpoint')
           - {"question": "Explain X differently"}  # free-text request
+
+        Pass `session` when the caller has already loaded it (e.g. for the
+        ownership check) to skip looking it up again.
         """
-        session = self.db.query(TeachingSession).filter(TeachingSession.id == session_id).first()
+        if session is None:
+            session = (await self.db.execute(select(TeachingSession).where(TeachingSession.id == session_id))).scalar_one_or_none()
         if not session:
             raise ValueError("Session not found")
 
+        # All changes of one turn (interaction log, position, state) are
+        # committed together, or not at all
+        try:
+            resp = await self._process_interaction(session, payload)
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+        return resp
+
+    async def _process_interaction(self, session: TeachingSession, payload: Dict[str, Any]) -> Dict[str, Any]:
         # Ensure we have a current concept
         if not session.current_concept_id:
             # try to set from module
             if session.current_module_id:
-                first = self.db.query(TeachingConcept).filter(TeachingConcept.module_id == session.current_module_id).order_by(TeachingConcept.created_at).first()
+                first = (await self.db.scalars(select(TeachingConcept).where(TeachingConcept.module_id == session.current_module_id).order_by(TeachingConcept.sequence_order).limit(1))).first()
                 if first:
                     session.current_concept_id = first.id
-                    self.db.commit()
-        concept = self.db.query(TeachingConcept).filter(TeachingConcept.id == session.current_concept_id).first() if session.current_concept_id else None
+        concept = await self._get_concept(session.current_concept_id)
 
         choice = payload.get("choice")
         question = payload.get("question")
@@ -162,7 +222,6 @@ class TeachingEngine:
                 time_spent_seconds=None,
             )
             self.db.add(interaction)
-            self.db.commit()
             return {"type": "content", "content": resp_text, "citations": [], "options": [
                 {"key": "continue", "text": "✓ Continue"},
                 {"key": "example", "text": "📝 Show example"},
@@ -174,9 +233,9 @@ class TeachingEngine:
             c_lower = str(choice).lower()
             # Continue / next
             if c_lower in ("continue", "next"):
-                next_concept = self._advance_to_next_concept(session)
+                next_concept = await self._advance_to_next_concept(session)
                 if next_concept:
-                    return self._make_content_response(session, next_concept)
+                    return await self._make_content_response(session, next_concept)
                 else:
                     return {"type": "summary", "content": "Module complete. Well done!", "options": [{"key": "next_module", "text": "Continue to next module"}], "progress": {"module": float(session.progress_percentage or 100), "overall": float(session.progress_percentage or 100)}}
 
@@ -189,7 +248,7 @@ class TeachingEngine:
             # Otherwise assume it's an answer key (A/B/C...)
             if len(str(choice)) == 1 and concept and concept.checkpoint_options:
                 # evaluate
-                result = self.evaluate_checkpoint(concept.id, str(choice))
+                result = await self.evaluate_checkpoint(concept.id, str(choice))
                 # log interaction
                 interaction = TeachingInteraction(
                     session_id=session.id,
@@ -205,10 +264,9 @@ class TeachingEngine:
                 # advance depending on correctness
                 if result.get("correct"):
                     # advance
-                    next_concept = self._advance_to_next_concept(session)
-                    self.db.commit()
+                    next_concept = await self._advance_to_next_concept(session)
                     if next_concept:
-                        return {"type": "feedback", "content": result.get("feedback"), "next": self._make_content_response(session, next_concept)}
+                        return {"type": "feedback", "content": result.get("feedback"), "next": await self._make_content_response(session, next_concept)}
                     else:
                         return {"type": "feedback", "content": result.get("feedback"), "next": {"type": "summary", "content": "Module complete."}}
                 else:
@@ -216,26 +274,35 @@ class TeachingEngine:
                     state = session.session_state or {}
                     state["retry_count"] = state.get("retry_count", 0) + 1
                     session.session_state = state
-                    self.db.commit()
                     return {"type": "feedback", "content": result.get("feedback"), "options": [{"key": "review", "text": "Review concept"}, {"key": "retry", "text": "Try again"}]}
 
         # Default: show current content
         if concept:
-            return self._make_content_response(session, concept)
+            return await self._make_content_response(session, concept)
 
         return {"type": "content", "content": "No teaching content available."}
 
-    def _make_content_response(self, session: TeachingSession, concept: TeachingConcept) -> Dict[str, Any]:
-        # Build content with citations (map chunk_ids to minimal citation info)
-        citations = []
-        for cid in (concept.chunk_ids or []):
-            chunk = self.db.query(Chunk).filter(Chunk.id == cid).first()
-            if chunk:
-                citations.append({"chunk_id": str(chunk.id), "page": chunk.page_number, "highlight": (chunk.text or "")[:200]})
+    async def _make_content_response(self, session: TeachingSession, concept: TeachingConcept) -> Dict[str, Any]:
+        # Build content with citations (map chunk_ids to minimal citation info).
+        # Concepts built since citations were stored carry them precomputed;
+        # older ones take one query for all cited chunks, only the columns a
+        # citation uses
+        citations = concept.citations
+        chunk_ids = concept.chunk_ids or []
+        if citations is None:
+            citations = []
+            if chunk_ids:
+                rows = (await self.db.execute(
+                    select(Chunk.id, Chunk.page_number, Chunk.text).where(Chunk.id.in_(chunk_ids))
+                )).all()
+                by_id = {str(row.id): row for row in rows}
+                for cid in chunk_ids:
+                    chunk = by_id.get(str(cid))
+                    if chunk:
+                        citations.append({"chunk_id": str(chunk.id), "page": chunk.page_number, "highlight": (chunk.text or "")[:200]})
 
         # update last_active
-        session.last_active_at = datetime.utcnow()
-        self.db.commit()
+        session.last_active_at = datetime.now(timezone.utc)
 
         return {
             "type": "content",
@@ -262,17 +329,16 @@ class TeachingEngine:
         state["current_step"] = "checkpoint"
         state["last_checkpoint_id"] = str(concept.id)
         session.session_state = state
-        session.last_active_at = datetime.utcnow()
-        self.db.commit()
+        session.last_active_at = datetime.now(timezone.utc)
 
         return {"type": "checkpoint", "content": concept.checkpoint_question or "", "options": options, "is_checkpoint": True, "progress": {"module": float(session.progress_percentage or 0), "overall": float(session.progress_percentage or 0)}}
 
-    def evaluate_checkpoint(self, concept_id, user_answer: str) -> Dict[str, Any]:
+    async def evaluate_checkpoint(self, concept_id, user_answer: str) -> Dict[str, Any]:
         """Evaluate checkpoint answer. Returns {correct: bool, feedback: str}.
 
         Strategy: if checkpoint_options has explicit 'correct' key, compare. Otherwise fallback to keyword matching.
         """
-        concept = self.db.query(TeachingConcept).filter(TeachingConcept.id == concept_id).first()
+        concept = await self._get_concept(concept_id)
         if not concept:
             return {"correct": False, "feedback": "Concept not found."}
 
@@ -1,15 +1,22 @@
 """File processing utilities for extracting text from various file formats."""
 import os
-from typing import Tuple
-from pathlib import Path
-import pypdf
-from docx import Document as DocxDocument
+import zipfile
+from typing import Dict, List, Optional, Tuple
+import pymupdf
+from lxml import etree
+
+from app.utils.text_chunker import TextChunker
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_DOCX_NS = {"w": _W[1:-1]}
+# Run content as python-docx renders it in Paragraph.text
+_DOCX_RUN_TEXT = {f"{_W}tab": "\t", f"{_W}ptab": "\t", f"{_W}cr": "\n", f"{_W}noBreakHyphen": "-"}
 
 
 class FileProcessor:
     """Extract text content from various file formats."""
     
-    SUPPORTED_EXTENSIONS = {'.pdf', '.docx', '.txt', '.md'}
+    SUPPORTED_EXTENSIONS = frozenset({'.pdf', '.docx', '.txt', '.md'})
     
     @staticmethod
     def extract_text(file_path: str) -> Tuple[str, str]:
@@ -25,8 +32,7 @@ class FileProcessor:
         Raises:
             ValueError: If file format is not supported
         """
-        path = Path(file_path)
-        extension = path.suffix.lower()
+        extension = os.path.splitext(file_path)[1].lower()
         
         if extension not in FileProcessor.SUPPORTED_EXTENSIONS:
             raise ValueError(f"Unsupported file format: {extension}")
@@ -46,11 +52,10 @@ class FileProcessor:
         text_parts = []
         
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = pypdf.PdfReader(file)
-                
-                for page_num, page in enumerate(pdf_reader.pages, 1):
-                    page_text = page.extract_text()
+            # MuPDF parses in C; much faster than walking pages in pure Python
+            with pymupdf.open(file_path) as pdf:
+                for page_num, page in enumerate(pdf, 1):
+                    page_text = page.get_text("text")
                     if page_text.strip():
                         text_parts.append(f"[Page {page_num}]\n{page_text}")
         except Exception as e:
@@ -60,10 +65,32 @@ class FileProcessor:
     
     @staticmethod
     def _extract_from_docx(file_path: str) -> str:
-        """Extract text from DOCX file."""
+        """Extract text from DOCX file.
+        
+        Reads word/document.xml with lxml directly instead of building a
+        python-docx Paragraph object per paragraph; the text matches
+        `para.text` for each top-level body paragraph.
+        """
         try:
-            doc = DocxDocument(file_path)
-            paragraphs = [para.text for para in doc.paragraphs if para.text.strip()]
+            with zipfile.ZipFile(file_path) as archive:
+                with archive.open("word/document.xml") as xml:
+                    body = etree.parse(xml).getroot().find(f"{_W}body")
+            
+            paragraphs = []
+            for p in body.iterchildren(f"{_W}p"):
+                parts = []
+                for el in p.xpath("./w:r/* | ./w:hyperlink/w:r/*", namespaces=_DOCX_NS):
+                    if el.tag == f"{_W}t":
+                        parts.append(el.text or "")
+                    elif el.tag == f"{_W}br":
+                        # page and column breaks add no text
+                        if el.get(f"{_W}type", "textWrapping") == "textWrapping":
+                            parts.append("\n")
+                    else:
+                        parts.append(_DOCX_RUN_TEXT.get(el.tag, ""))
+                text = "".join(parts)
+                if text.strip():
+                    paragraphs.append(text)
             return "\n\n".join(paragraphs)
         except Exception as e:
             raise ValueError(f"Error extracting text from DOCX: {str(e)}")
@@ -71,18 +98,62 @@ class FileProcessor:
     @staticmethod
     def _extract_from_text(file_path: str) -> str:
         """Extract text from plain text file."""
+        # Read the bytes once; a non-UTF-8 file is decoded again from memory
+        # instead of being re-read from disk
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                return file.read()
-        except UnicodeDecodeError:
-            # Try with different encoding
-            with open(file_path, 'r', encoding='latin-1') as file:
-                return file.read()
+            with open(file_path, 'rb') as file:
+                data = file.read()
         except Exception as e:
             raise ValueError(f"Error reading text file: {str(e)}")
+        try:
+            text = data.decode('utf-8')
+        except UnicodeDecodeError:
+            # Try with different encoding
+            text = data.decode('latin-1')
+        # Universal newlines, as text-mode reads gave
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        return text
     
     @staticmethod
     def is_supported(filename: str) -> bool:
         """Check if a file format is supported."""
-        extension = Path(filename).suffix.lower()
-        return extension in FileProcessor.SUPPORTED_EXTENSIONS
+        return os.path.splitext(filename)[1].lower() in FileProcessor.SUPPORTED_EXTENSIONS
+
+
+def extract_and_chunk(
+    file_path: str,
+    filename: str,
+    text: Optional[str] = None,
+    chunk_size: int = 1000,
+    overlap: int = 200
+) -> Tuple[str, List[Dict]]:
+    """
+    Extract a saved file's text and split it into chunks.
+    
+    Module-level so it can be sent to a worker process; parsing and chunking
+    are pure-Python CPU work that threads cannot run in parallel.
+    
+    Args:
+        file_path: Path to the file
+        filename: Original filename, recorded on each chunk
+        text: Previously extracted text for identical content; skips extraction
+        
+    Returns:
+        Tuple of (text, chunks); chunks is empty for files without text
+        
+    Raises:
+        ValueError: If the file cannot be processed
+    """
+    if text is None:
+        text, _ = FileProcessor.extract_text(file_path)
+    
+    if not text.strip():
+        return text, []
+    
+    return text, TextChunker.chunk_text(
+        text=text,
+        chunk_size=chunk_size,
+        overlap=overlap,
+        source_filename=filename
+    )
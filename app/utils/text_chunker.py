@@ -2,6 +2,12 @@
 import re
 from typing import List, Dict, Optional
 
+_PARAGRAPH_BREAK_RE = re.compile(r'\n\s*\n+')
+_SENTENCE_BREAK_RE = re.compile(r'(?<=[.!?])\s+')
+_PAGE_RE = re.compile(r'\[Page (\d+)\]')
+_PAGE_MARKER_RE = re.compile(r'\[Page \d+\]\n?')
+_KEYWORD_RE = re.compile(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b')
+
 
 class TextChunker:
     """Split text into chunks with metadata."""
@@ -34,14 +40,19 @@ class TextChunker:
         # Split by paragraphs first to maintain context
         paragraphs = TextChunker._split_into_paragraphs(text)
         
+        # The current chunk is kept as a list of pieces plus its length and
+        # joined only when it is emitted, instead of copying a growing string
+        # on every append
         chunks = []
-        current_chunk = ""
+        parts: List[str] = []
+        length = 0
         chunk_number = 1
         
         for para in paragraphs:
             # If paragraph alone is larger than chunk_size, split it
             if len(para) > chunk_size:
                 # Save current chunk if it has content
+                current_chunk = "".join(parts)
                 if current_chunk.strip():
                     chunks.append(TextChunker._create_chunk_dict(
                         current_chunk.strip(),
@@ -49,48 +60,40 @@ class TextChunker:
                         source_filename
                     ))
                     chunk_number += 1
-                    current_chunk = ""
+                    parts, length = [], 0
                 
                 # Split large paragraph into sentences
-                sentences = TextChunker._split_into_sentences(para)
-                for sentence in sentences:
-                    if len(current_chunk) + len(sentence) <= chunk_size:
-                        current_chunk += sentence + " "
-                    else:
-                        if current_chunk.strip():
-                            chunks.append(TextChunker._create_chunk_dict(
-                                current_chunk.strip(),
-                                chunk_number,
-                                source_filename
-                            ))
-                            chunk_number += 1
-                        
-                        # Start new chunk with overlap
-                        if overlap > 0 and len(current_chunk) > overlap:
-                            current_chunk = current_chunk[-overlap:] + sentence + " "
-                        else:
-                            current_chunk = sentence + " "
+                pieces = [(sentence, " ") for sentence in TextChunker._split_into_sentences(para)]
             else:
-                # Try to add paragraph to current chunk
-                if len(current_chunk) + len(para) <= chunk_size:
-                    current_chunk += para + "\n\n"
+                pieces = [(para, "\n\n")]
+            
+            for piece, separator in pieces:
+                # Try to add the piece to the current chunk
+                if length + len(piece) <= chunk_size:
+                    parts += (piece, separator)
+                    length += len(piece) + len(separator)
+                    continue
+                
+                # Save current chunk and start new one
+                current_chunk = "".join(parts)
+                if current_chunk.strip():
+                    chunks.append(TextChunker._create_chunk_dict(
+                        current_chunk.strip(),
+                        chunk_number,
+                        source_filename
+                    ))
+                    chunk_number += 1
+                
+                # Start new chunk with overlap
+                if overlap > 0 and length > overlap:
+                    parts = [current_chunk[-overlap:], piece, separator]
+                    length = overlap + len(piece) + len(separator)
                 else:
-                    # Save current chunk and start new one
-                    if current_chunk.strip():
-                        chunks.append(TextChunker._create_chunk_dict(
-                            current_chunk.strip(),
-                            chunk_number,
-                            source_filename
-                        ))
-                        chunk_number += 1
-                    
-                    # Start new chunk with overlap
-                    if overlap > 0 and len(current_chunk) > overlap:
-                        current_chunk = current_chunk[-overlap:] + para + "\n\n"
-                    else:
-                        current_chunk = para + "\n\n"
+                    parts = [piece, separator]
+                    length = len(piece) + len(separator)
         
         # Add final chunk
+        current_chunk = "".join(parts)
         if current_chunk.strip():
             chunks.append(TextChunker._create_chunk_dict(
                 current_chunk.strip(),
@@ -104,14 +107,14 @@ class TextChunker:
     def _split_into_paragraphs(text: str) -> List[str]:
         """Split text into paragraphs."""
         # Split by double newlines or multiple spaces
-        paragraphs = re.split(r'\n\s*\n+', text)
+        paragraphs = _PARAGRAPH_BREAK_RE.split(text)
         return [p.strip() for p in paragraphs if p.strip()]
     
     @staticmethod
     def _split_into_sentences(text: str) -> List[str]:
         """Split text into sentences."""
         # Simple sentence splitter (can be improved with NLP)
-        sentences = re.split(r'(?<=[.!?])\s+', text)
+        sentences = _SENTENCE_BREAK_RE.split(text)
         return [s.strip() for s in sentences if s.strip()]
     
     @staticmethod
@@ -125,15 +128,20 @@ class TextChunker:
         first_line = text.split('\n')[0][:200] if '\n' in text else text[:200]
         
         # Extract page number if present in text
-        page_match = re.search(r'\[Page (\d+)\]', text)
+        page_match = _PAGE_RE.search(text)
         page_number = int(page_match.group(1)) if page_match else None
         
         # Remove page markers from text
-        clean_text = re.sub(r'\[Page \d+\]\n?', '', text)
+        clean_text = _PAGE_MARKER_RE.sub('', text)
         
-        # Extract keywords (simple approach: get capitalized words)
-        keywords = list(set(re.findall(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b', clean_text)))
-        keywords = keywords[:10]  # Limit to 10 keywords
+        # Extract keywords (simple approach: get capitalized words), the first
+        # 10 distinct ones; the scan stops once 10 are found
+        found = {}
+        for match in _KEYWORD_RE.finditer(clean_text):
+            found[match.group()] = None
+            if len(found) == 10:
+                break
+        keywords = list(found)
         
         return {
             'text': clean_text.strip(),
@@ -0,0 +1,24 @@
+-- Migration: Record each chunk's position within its document
+-- Created: 2026-10-15
+-- Description: A document's chunks are inserted in one multi-row INSERT, where
+--              created_at can tie, so it cannot order them. chunk_index stores the
+--              chunk's position in the document; existing rows are numbered by
+--              (created_at, id). The teach builder reads chunks ordered by
+--              (document_id, chunk_index).
+
+ALTER TABLE chunks
+    ADD COLUMN IF NOT EXISTS chunk_index INTEGER;
+
+UPDATE chunks c
+SET chunk_index = ordered.position
+FROM (
+    SELECT id, row_number() OVER (PARTITION BY document_id ORDER BY created_at, id) - 1 AS position
+    FROM chunks
+) ordered
+WHERE c.id = ordered.id AND c.chunk_index IS NULL;
+
+ALTER TABLE chunks
+    ALTER COLUMN chunk_index SET NOT NULL;
+
+CREATE INDEX IF NOT EXISTS ix_chunks_document_index
+    ON chunks(document_id, chunk_index);
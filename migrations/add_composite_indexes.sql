@@ -0,0 +1,9 @@
+-- Migration: Add composite indexes for hot query patterns
+-- Created: 2026-10-15
+-- Description: Multi-column indexes matching the filter + order patterns used by the
+--              routes and teach services.
+
+CREATE INDEX IF NOT EXISTS ix_chunks_kb_topic ON chunks(kb_id, topic);
+CREATE INDEX IF NOT EXISTS ix_chunks_document_page ON chunks(document_id, page_number);
+CREATE INDEX IF NOT EXISTS ix_quiz_questions_quiz_order ON quiz_questions(quiz_id, question_order);
+CREATE INDEX IF NOT EXISTS ix_concepts_module_created ON teaching_concepts(module_id, created_at);
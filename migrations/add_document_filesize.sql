@@ -0,0 +1,8 @@
+-- Migration: Store document file sizes
+-- Created: 2026-10-15
+-- Description: Sizes are recorded at upload so listing knowledge bases no longer stats
+--              every file. Rows uploaded before this migration stay NULL and fall back
+--              to a stat() when listed.
+
+ALTER TABLE documents
+    ADD COLUMN IF NOT EXISTS filesize BIGINT;
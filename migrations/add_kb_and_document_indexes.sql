@@ -0,0 +1,8 @@
+-- Migration: Index knowledge base listing and document lookups
+-- Created: 2026-10-15
+-- Description: list_knowledge_bases filters by user_id and orders by created_at DESC;
+--              documents are looked up and counted by kb_id. chunks.kb_id and
+--              question_bank.kb_id are already indexed.
+
+CREATE INDEX IF NOT EXISTS ix_knowledge_bases_user_created ON knowledge_bases(user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS ix_documents_kb_id ON documents(kb_id);
@@ -0,0 +1,7 @@
+-- Migration: Track question bank generation per knowledge base
+-- Created: 2026-10-15
+-- Description: The question bank is generated in a background task after upload;
+--              clients poll question_bank_status (PENDING / COMPLETED / FAILED).
+
+ALTER TABLE knowledge_bases
+    ADD COLUMN IF NOT EXISTS question_bank_status VARCHAR(30);
@@ -0,0 +1,10 @@
+-- Migration: Cache extracted text by file content hash
+-- Created: 2026-10-15
+-- Description: Uploads are hashed (blake2b-128) while they are written to disk; files
+--              whose hash is already here skip text extraction.
+
+CREATE TABLE IF NOT EXISTS parsed_contents (
+    content_hash VARCHAR(32) PRIMARY KEY,
+    text TEXT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
@@ -0,0 +1,11 @@
+-- Migration: Add a random sort key to question_bank
+-- Created: 2026-10-15
+-- Description: Quizzes sample questions by seeking to a random point in random_key
+--              order instead of ORDER BY random(), which sorted the whole bank for
+--              every quiz. Existing rows get a key from the column default.
+
+ALTER TABLE question_bank
+    ADD COLUMN IF NOT EXISTS random_key DOUBLE PRECISION NOT NULL DEFAULT random();
+
+CREATE INDEX IF NOT EXISTS ix_question_bank_kb_difficulty_random
+    ON question_bank(kb_id, difficulty, random_key);
@@ -0,0 +1,9 @@
+-- Migration: Store citations on teaching_concepts
+-- Created: 2026-10-15
+-- Description: The teach builder now writes each concept's citations
+--              ([{chunk_id, page, highlight}]) when it creates the concept, so showing
+--              a concept needs no chunk lookup. Existing concepts keep NULL and are
+--              still resolved from chunk_ids at render time.
+
+ALTER TABLE teaching_concepts
+    ADD COLUMN IF NOT EXISTS citations JSONB;
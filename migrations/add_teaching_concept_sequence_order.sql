@@ -0,0 +1,25 @@
+-- Migration: Order teaching concepts by an explicit position
+-- Created: 2026-10-15
+-- Description: Concepts of a module are inserted in one multi-row INSERT, where
+--              created_at can tie, so their order was not reliable. sequence_order
+--              stores each concept's position within its module; existing rows are
+--              numbered by (created_at, id).
+
+ALTER TABLE teaching_concepts
+    ADD COLUMN IF NOT EXISTS sequence_order INTEGER;
+
+UPDATE teaching_concepts tc
+SET sequence_order = ordered.position
+FROM (
+    SELECT id, row_number() OVER (PARTITION BY module_id ORDER BY created_at, id) AS position
+    FROM teaching_concepts
+) ordered
+WHERE tc.id = ordered.id AND tc.sequence_order IS NULL;
+
+ALTER TABLE teaching_concepts
+    ALTER COLUMN sequence_order SET NOT NULL;
+
+CREATE INDEX IF NOT EXISTS ix_concepts_module_sequence
+    ON teaching_concepts(module_id, sequence_order);
+
+DROP INDEX IF EXISTS ix_concepts_module_created;
@@ -0,0 +1,17 @@
+-- Migration: Add indexes for teach mode lookups
+-- Created: 2026-10-15
+-- Description: start_session resumes the most recently active open session for a
+--              user and KB; a partial index over open sessions serves it without a
+--              sort. Module lookups filter by kb_id and order or compare by
+--              sequence_order; the composite index replaces the kb_id-only index,
+--              which is its prefix. teaching_concepts(module_id, created_at) is
+--              already covered by ix_concepts_module_created.
+
+CREATE INDEX IF NOT EXISTS ix_teaching_sessions_active
+    ON teaching_sessions(user_id, kb_id, last_active_at DESC)
+    WHERE completed_at IS NULL;
+
+CREATE INDEX IF NOT EXISTS ix_teaching_modules_kb_sequence
+    ON teaching_modules(kb_id, sequence_order);
+
+DROP INDEX IF EXISTS ix_teaching_modules_kb_id;
@@ -0,0 +1,10 @@
+-- Migration: Bound users.password_hash length
+-- Created: 2026-10-15
+-- Description: Password hashes are fixed-width (bcrypt 60, Argon2id 97 chars), so the
+--              column becomes VARCHAR(128) with a check rejecting empty hashes.
+
+ALTER TABLE users
+    ALTER COLUMN password_hash TYPE VARCHAR(128);
+
+ALTER TABLE users
+    ADD CONSTRAINT ck_users_password_hash_not_empty CHECK (length(password_hash) > 0);
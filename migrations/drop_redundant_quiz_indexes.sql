@@ -0,0 +1,12 @@
+-- Migration: Drop indexes made redundant by composite indexes
+-- Created: 2026-10-15
+-- Description: question_bank lookups are served by
+--              ix_question_bank_kb_difficulty_random (kb_id, difficulty, random_key)
+--              and quiz question lookups by ix_quiz_questions_quiz_order
+--              (quiz_id, question_order). The indexes below are prefixes of those
+--              and only add write cost.
+
+DROP INDEX IF EXISTS idx_question_bank_kb;
+DROP INDEX IF EXISTS idx_question_bank_difficulty;
+DROP INDEX IF EXISTS ix_question_bank_kb_id;
+DROP INDEX IF EXISTS ix_quiz_questions_quiz_id;
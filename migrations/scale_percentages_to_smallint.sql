@@ -0,0 +1,15 @@
+-- Migration: Store scores and percentages as SMALLINT hundredths
+-- Created: 2026-10-15
+-- Description: NUMERIC score/accuracy/progress columns become fixed-width SMALLINT
+--              holding value × 100 (e.g. 87.50% -> 8750). The models expose the
+--              original float values through hybrid properties.
+
+ALTER TABLE quiz_answers
+    ALTER COLUMN score TYPE SMALLINT USING round(score * 100)::smallint;
+
+ALTER TABLE quiz_summaries
+    ALTER COLUMN accuracy TYPE SMALLINT USING round(accuracy * 100)::smallint;
+
+ALTER TABLE teaching_sessions
+    ALTER COLUMN progress_percentage TYPE SMALLINT USING round(progress_percentage * 100)::smallint,
+    ALTER COLUMN progress_percentage SET DEFAULT 0;